@@ -0,0 +1,71 @@
+"""
+Benchmark the time and memory of importing pyharmonics modules, each in a fresh interpreter,
+and report which heavy backends each import loads.
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --max-seconds 1.0 pyharmonics pyharmonics.search
+
+Exits non zero when an import is slower than --max-seconds or loads a heavy backend it should not.
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+HEAVY = ('plotly', 'yfinance', 'binance', 'alpaca_trade_api')
+# Modules that only need pandas, numpy and ta.
+HEADLESS = ('pyharmonics', 'pyharmonics.search', 'pyharmonics.marketdata', 'pyharmonics.quick')
+MODULES = HEADLESS + ('pyharmonics.plotter.harmonic', 'pyharmonics.marketdata.binance_data')
+
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    'seconds': elapsed,
+    'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'heavy': [name for name in {heavy!r} if name in sys.modules],
+}}))
+"""
+
+
+def measure(module, repeat=3):
+    """
+    Import a module in a fresh interpreter, keeping the fastest of repeat runs.
+
+    :param str module: The module to import.
+    :param int repeat: The number of interpreters to start.
+    :return: dict with seconds, max_rss_mb and the heavy backends loaded.
+    """
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, '-c', PROBE.format(module=module, heavy=HEAVY)],
+            check=True, capture_output=True, text=True
+        ).stdout
+        runs.append(json.loads(out))
+    return min(runs, key=lambda run: run['seconds'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('modules', nargs='*', default=MODULES)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--max-seconds', type=float, default=None)
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.modules:
+        result = measure(module, args.repeat)
+        heavy = ', '.join(result['heavy']) or '-'
+        print(f"{module:40} {result['seconds']:.3f}s  rss {result['max_rss_mb']:.0f}MB  heavy: {heavy}")
+        if module in HEADLESS and result['heavy']:
+            failed = True
+        if args.max_seconds is not None and result['seconds'] > args.max_seconds:
+            failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
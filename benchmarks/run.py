@@ -0,0 +1,220 @@
+"""
+Benchmark the search and technicals hot paths on synthetic candles and write the results to JSON.
+
+Each case is a generator, a number of candles and a peak_spacing.  For each case the stages below
+are timed, best of --repeat, then run once more under tracemalloc for their peak memory.
+Every run of a stage starts from the same state, search starts with an empty candle search cache
+and forming starts with the cache search left, as it does after HarmonicSearch.search().
+
+    technicals    OHLCTechnicals(df, ...)
+    fib_matrix    HarmonicSearch._build_fib_matrix()
+    search        HarmonicSearch.search()
+    forming       HarmonicSearch.forming()
+    divergences   DivergenceSearch.search()
+
+The full grid takes around ten minutes, most of it tracing memory, --no-memory skips that pass.
+
+    python benchmarks/run.py --output before.json
+    python benchmarks/run.py --output after.json --baseline before.json
+    python benchmarks/run.py --candles 1000 10000 --peak-spacing 10 --generators regime --no-memory
+"""
+import argparse
+import datetime
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from pyharmonics.technicals import OHLCTechnicals
+from pyharmonics.search import HarmonicSearch, DivergenceSearch
+from synthetic import GENERATORS
+
+STAGES = ('technicals', 'fib_matrix', 'search', 'forming', 'divergences')
+
+
+def count(patterns):
+    """
+    The number of patterns in each family.
+    """
+    return {family: len(found) for family, found in patterns.items()}
+
+
+class Case:
+    """
+    Runs every stage on one set of candles, each stage starting from the state the previous stage left.
+    """
+    def __init__(self, df, peak_spacing):
+        self.df = df
+        self.peak_spacing = peak_spacing
+        self.t = None
+        self.h = None
+        self.d = None
+        self._searched = {}
+
+    def setup(self, stage):
+        """
+        Put the candle search cache back to the state the stage starts from.
+        """
+        if stage == 'search':
+            self.h._candle_cache = {}
+        elif stage == 'forming':
+            self.h._candle_cache = dict(self._searched)
+
+    def technicals(self):
+        self.t = OHLCTechnicals(self.df, 'SYNTH', '1h', peak_spacing=self.peak_spacing)
+
+    def fib_matrix(self):
+        if self.h is None:
+            self.h = HarmonicSearch(self.t)
+        else:
+            self.h._build_fib_matrix()
+
+    def search(self):
+        self.h.search()
+        self._searched = dict(self.h._candle_cache)
+
+    def forming(self):
+        self.h.forming()
+
+    def divergences(self):
+        self.d = DivergenceSearch(self.t)
+        self.d.search()
+
+    def counts(self):
+        return {
+            'peaks': self.h.MATRIX_LEN,
+            'formed': count(self.h.get_patterns()),
+            'forming': count(self.h.get_patterns(formed=False)),
+            'divergences': count(self.d.get_patterns()),
+        }
+
+
+def measure(case, stage, repeat, memory=True):
+    """
+    Time a stage, best of repeat, then measure its peak memory in one more run.
+
+    :param Case case: The case to run the stage on.
+    :param str stage: The name of the stage.
+    :param int repeat: The number of timed runs.
+    :param bool memory: False to skip measuring the peak memory.
+    :return: dict with seconds and peak_mb, peak_mb is None when memory is False.
+    """
+    run = getattr(case, stage)
+    timings = []
+    for _ in range(repeat):
+        case.setup(stage)
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    if not memory:
+        return {'seconds': min(timings), 'peak_mb': None}
+    case.setup(stage)
+    tracemalloc.start()
+    run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {'seconds': min(timings), 'peak_mb': peak / 1e6}
+
+
+def run_case(generator, candles, peak_spacing, repeat, memory=True):
+    """
+    Benchmark every stage on one set of synthetic candles.
+
+    >>> run_case('regime', 10000, peak_spacing=10, repeat=3)
+
+    :return: dict describing the case with the results of each stage and the pattern counts.
+    """
+    case = Case(GENERATORS[generator](candles), peak_spacing)
+    stages = {stage: measure(case, stage, repeat, memory) for stage in STAGES}
+    return {
+        'generator': generator,
+        'candles': candles,
+        'peak_spacing': peak_spacing,
+        'stages': stages,
+        'counts': case.counts(),
+    }
+
+
+def environment():
+    """
+    What the results were measured on.
+    """
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'date': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+    }
+
+
+def key(case):
+    return case['generator'], case['candles'], case['peak_spacing']
+
+
+def report(case, baseline=None):
+    """
+    Print a case, one line per stage, with the speed up against the same case in a baseline run.
+
+    :param dict case: The results of run_case.
+    :param dict baseline: The JSON of an earlier run.
+    """
+    old = {key(c): c for c in baseline['cases']}.get(key(case)) if baseline else None
+    formed = sum(case['counts']['formed'].values())
+    forming = sum(case['counts']['forming'].values())
+    print(
+        f"{case['generator']:12} {case['candles']:>7} candles  spacing {case['peak_spacing']:<3}"
+        f"{case['counts']['peaks']:>6} peaks  {formed} formed  {forming} forming"
+    )
+    if old and old['counts'] != case['counts']:
+        print('    pattern counts differ from the baseline')
+    for stage, result in case['stages'].items():
+        line = f"    {stage:12} {result['seconds']:9.4f}s"
+        if result['peak_mb'] is not None:
+            line += f"  {result['peak_mb']:9.1f}MB"
+        if old:
+            speed_up = old['stages'][stage]['seconds'] / max(result['seconds'], 1e-9)
+            line += f'  x{speed_up:.2f}'
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--generators', nargs='+', default=list(GENERATORS), choices=list(GENERATORS))
+    parser.add_argument('--candles', nargs='+', type=int, default=[1000, 10000, 100000])
+    parser.add_argument('--peak-spacing', nargs='+', type=int, default=[5, 10, 20])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--no-memory', dest='memory', action='store_false', help='Only measure the time of each stage.')
+    parser.add_argument('--output', default='benchmarks.json', help='The JSON file to write the results to.')
+    parser.add_argument('--baseline', help='A JSON file from an earlier run to compare against.')
+    args = parser.parse_args()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    cases = []
+    for generator in args.generators:
+        for candles in args.candles:
+            for peak_spacing in args.peak_spacing:
+                cases.append(run_case(generator, candles, peak_spacing, args.repeat, args.memory))
+                report(cases[-1], baseline)
+
+    with open(args.output, 'w') as f:
+        json.dump({'environment': environment(), 'repeat': args.repeat, 'cases': cases}, f, indent=2)
+    print(f'Wrote {len(cases)} cases to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
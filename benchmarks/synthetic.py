@@ -0,0 +1,83 @@
+"""
+Deterministic synthetic OHLCV candles for the benchmarks.  The same generator, size and seed
+always give the same candles, so timings and pattern counts can be compared across commits.
+
+    >>> df = random_walk_candles(10000)
+    >>> df = regime_switching_candles(10000, seed=3)
+    >>> df = GENERATORS['regime'](100000)
+"""
+import numpy as np
+import pandas as pd
+
+
+def _candles(close, rng):
+    """
+    Wrap closes in hourly OHLCV candles, each opening at the previous close.
+    """
+    candles = len(close)
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    spread = np.abs(rng.normal(0, 0.002, candles)) * close
+    return pd.DataFrame(
+        {
+            'open': open_,
+            'high': np.maximum(open_, close) + spread,
+            'low': np.minimum(open_, close) - spread,
+            'close': close,
+            'volume': rng.uniform(10, 1000, candles),
+        },
+        index=pd.date_range('2015-01-01', periods=candles, freq='h', name='close_time')
+    )
+
+
+def random_walk_candles(candles, seed=7):
+    """
+    An hourly OHLCV random walk, reproducible for a given seed.
+
+    :param int candles: The number of candles.
+    :param int seed: The seed of the random generator.
+    :return: pandas.DataFrame
+    """
+    rng = np.random.default_rng(seed)
+    close = 20000 * np.exp(np.cumsum(rng.normal(0, 0.004, candles)))
+    return _candles(close, rng)
+
+
+def regime_switching_candles(candles, seed=7, mean_regime=500):
+    """
+    Hourly OHLCV candles that switch between trending up, trending down and ranging markets.
+    Regimes last mean_regime candles on average and each has its own drift and volatility,
+    ranging markets revert to the price the range started at.
+
+    :param int candles: The number of candles.
+    :param int seed: The seed of the random generator.
+    :param int mean_regime: The average number of candles in a regime.
+    :return: pandas.DataFrame
+    """
+    rng = np.random.default_rng(seed)
+    # ( drift, volatility, reversion ) of the log price per candle.
+    regimes = np.array([
+        (0.0006, 0.004, 0.0),   # trending up
+        (-0.0006, 0.005, 0.0),  # trending down
+        (0.0, 0.003, 0.02),     # ranging
+    ])
+    lengths = rng.geometric(1 / mean_regime, candles)
+    kinds = rng.integers(0, len(regimes), len(lengths))
+    regime = np.repeat(kinds, lengths)[:candles]
+    starts = np.flatnonzero(np.diff(regime, prepend=-1))
+
+    log_price = np.empty(candles)
+    shocks = rng.normal(0, 1, candles)
+    price = np.log(20000)
+    for start, end in zip(starts, np.append(starts[1:], candles)):
+        drift, volatility, reversion = regimes[regime[start]]
+        anchor = price
+        for i in range(start, end):
+            price += drift + volatility * shocks[i] - reversion * (price - anchor)
+            log_price[i] = price
+    return _candles(np.exp(log_price), rng)
+
+
+GENERATORS = {
+    'random_walk': random_walk_candles,
+    'regime': regime_switching_candles,
+}
@@ -0,0 +1,29 @@
+"""
+Benchmark building OHLCTechnicals on a long random walk of candles.
+
+    python benchmarks/technicals_build.py --candles 100000 --repeat 3
+"""
+import argparse
+import time
+from pyharmonics.technicals import OHLCTechnicals
+from synthetic import random_walk_candles
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--candles', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--peak-spacing', type=int, default=10)
+    args = parser.parse_args()
+
+    df = random_walk_candles(args.candles)
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        t = OHLCTechnicals(df, 'SYNTH', '1h', peak_spacing=args.peak_spacing)
+        timings.append(time.perf_counter() - start)
+    print(f'{args.candles} candles, {len(t.peak_data)} peaks: best {min(timings):.3f}s of {args.repeat}')
+
+
+if __name__ == '__main__':
+    main()
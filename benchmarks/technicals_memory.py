@@ -0,0 +1,42 @@
+"""
+Benchmark the peak memory and time of building OHLCTechnicals, with and without copying the candles.
+
+    python benchmarks/technicals_memory.py --candles 100000
+"""
+import argparse
+import time
+import tracemalloc
+from pyharmonics.technicals import OHLCTechnicals
+from synthetic import random_walk_candles
+
+
+def measure(df, copy):
+    """
+    Build OHLCTechnicals once under tracemalloc.
+
+    :return: tuple ( seconds, peak bytes allocated while building )
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    OHLCTechnicals(df, 'SYNTH', '1h', copy=copy)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--candles', type=int, default=100000)
+    args = parser.parse_args()
+
+    df = random_walk_candles(args.candles)
+    print(f'{args.candles} candles, {df.memory_usage(index=True).sum() / 1e6:.1f}MB of OHLCV')
+    for copy in (True, False):
+        measure(df, copy)  # warm up imports and caches
+        elapsed, peak = measure(df, copy)
+        print(f'copy={copy!s:5}  {elapsed:.3f}s  peak {peak / 1e6:.1f}MB')
+
+
+if __name__ == '__main__':
+    main()
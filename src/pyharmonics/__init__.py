@@ -1,7 +1,9 @@
 from .technicals import OHLCTechnicals, Technicals
-from .plotter.harmonic import PositionPlotter, HarmonicPlotter
 from .patterns import ABCPattern, ABCDPattern, XABCDPattern
 from .positions import Position
+from .stats import Stats
+from .backtest import Backtest
+import importlib as _importlib
 
 __all__ = (
     'OHLCTechnicals',
@@ -11,5 +13,30 @@ __all__ = (
     'ABCPattern',
     'ABCDPattern',
     'XABCDPattern',
-    'Position'
+    'Position',
+    'Stats',
+    'Backtest'
 )
+
+# Plotters load plotly and the market data sources load their API clients, which takes seconds.
+# They are imported the first time they are used, PEP 562.
+_LAZY = {
+    'PositionPlotter': 'pyharmonics.plotter.harmonic',
+    'HarmonicPlotter': 'pyharmonics.plotter.harmonic'
+}
+_SUBPACKAGES = ('marketdata', 'plotter', 'search', 'quick')
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        value = getattr(_importlib.import_module(_LAZY[name]), name)
+    elif name in _SUBPACKAGES:
+        value = _importlib.import_module(f'{__name__}.{name}')
+    else:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY) | set(_SUBPACKAGES))
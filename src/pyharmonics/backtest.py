@@ -0,0 +1,220 @@
+__author__ = 'github.com/niall-oc'
+
+from pyharmonics import constants
+from pyharmonics.positions import Position
+import numpy as np
+import pandas as pd
+
+
+def _range_max_table(values):
+    """
+    A sparse table of running maxima, row k holds the max of values[i:i + 2**k] for each i.
+    Windows running past the end are cut short.
+
+    :param numpy.ndarray values: The readings.
+    :return: numpy.ndarray of shape ( levels, len(values) ) where 2 ** levels > len(values).
+    """
+    size = len(values)
+    levels = max(1, int(size).bit_length())
+    table = np.empty((levels, size), dtype=np.float64)
+    table[0] = values
+    for k in range(1, levels):
+        half = 1 << (k - 1)
+        table[k] = table[k - 1]
+        np.maximum(table[k, :size - half], table[k - 1, half:], out=table[k, :size - half])
+    return table
+
+
+def _first_touch(table, starts, levels):
+    """
+    The first index at or after each start where the readings reach a level, for every start at once.
+    Binary lifting on the sparse table, each step skips a window when its max is still below the level.
+
+    >>> _first_touch(_range_max_table(high), np.array([10, 20]), np.array([21000.0, 19000.0]))
+    array([ 14,  -1])
+
+    :param numpy.ndarray table: From _range_max_table.
+    :param numpy.ndarray starts: The first index to look at for each level.
+    :param numpy.ndarray levels: The level to reach.
+    :return: numpy.ndarray of indexes, -1 where a level is never reached.
+    """
+    size = table.shape[1]
+    found = np.asarray(starts, dtype=np.int64).copy()
+    for k in range(table.shape[0] - 1, -1, -1):
+        inside = found < size
+        below = np.zeros(len(found), dtype=bool)
+        below[inside] = table[k, found[inside]] < levels[inside]
+        found[below] += 1 << k
+    found[found >= size] = -1
+    return found
+
+
+class Backtest:
+    """
+    Walk price forward from every pattern found to see which position targets were hit.
+
+    A Position is built for each formed pattern with its strike at the D ( or C ) price, so the targets and
+    stop follow the Position rules.  The stop and each target are then located at once for every position,
+    as the first candle after the entry whose high or low reaches it.
+
+    A stop and a target reached on the same candle count as stopped, the order within a candle is not known.
+    A pattern is only confirmed once peak_spacing candles have passed its last point, use entry_delay
+    to start walking from there.
+
+    >>> h = HarmonicSearch(t)
+    >>> h.search()
+    >>> bt = Backtest(t, h.get_patterns())
+    >>> bt.run()
+    >>> bt.summary()
+                    positions  closed   stopped        t1        t2        t3  win_rate  mean_return  total_return
+    family name
+    ABC    0.707                9       9  0.222222  0.777778  0.555556  0.333333  0.777778     0.014421      0.129793
+    """
+    COLUMNS = [
+        'family', 'name', 'bullish', 'entry', 'entry_time', 'strike', 'stop', 't1', 't2', 't3',
+        'stop_at', 't1_at', 't2_at', 't3_at', 'exit', 'target_hit', 'status', 'return'
+    ]
+
+    def __init__(self, technicals, patterns, dollar_amount=1000, entry_delay=0, max_hold=None):
+        """
+        Constructor for Backtest
+
+        :param pyharmonics.technicals.TechnicalsBase technicals: The candles the patterns were found in.
+        :param dict patterns: Formed patterns by family, as returned by HarmonicSearch.get_patterns().
+        :param float dollar_amount: The size of each position.
+        :param int entry_delay: Candles to wait after the last point of a pattern before the position is walked.
+        :param int max_hold: The most candles a position is walked for, it is left open after that.
+            None walks to the last candle.
+        """
+        self.td = technicals
+        self.patterns = [(family, p) for family, found in patterns.items() for p in found if p.formed]
+        self.dollar_amount = dollar_amount
+        self.entry_delay = entry_delay
+        self.max_hold = max_hold
+        self.positions = []
+        self.results = None
+
+    def run(self):
+        """
+        Build a position for every pattern and find the outcome of each.
+        Every Position has its status and target_hit set, the stop and targets reached are in results.
+
+        >>> bt.run()
+        >>> bt.positions[0].target_hit
+        'target2'
+
+        :return: pandas.DataFrame with one row per position, see COLUMNS.
+            Candle indexes are -1 where a level was never reached, return is nan for positions still open.
+        """
+        self.positions = [Position(p, p.y[-1], self.dollar_amount) for _, p in self.patterns]
+        count = len(self.positions)
+        long = np.fromiter((pos.long for pos in self.positions), dtype=bool, count=count)
+        strike = np.fromiter((pos.strike for pos in self.positions), dtype=np.float64, count=count)
+        stop = np.fromiter((pos.stop for pos in self.positions), dtype=np.float64, count=count)
+        targets = np.array([pos.targets for pos in self.positions], dtype=np.float64).reshape(count, 3)
+        entry = np.fromiter((p.indexes[-1] for _, p in self.patterns), dtype=np.int64, count=count)
+        starts = entry + 1 + self.entry_delay
+
+        touched = self._touch(long, starts, stop, targets)
+        if self.max_hold is not None:
+            touched[touched >= (starts + self.max_hold)[:, None]] = -1
+        stop_at = touched[:, 0]
+        stopped = stop_at >= 0
+        # A target counts when it is reached before the stop, a tie goes to the stop.
+        hit = (touched[:, 1:] >= 0) & (~stopped[:, None] | (touched[:, 1:] < stop_at[:, None]))
+        hits = hit.sum(axis=1)
+        closed = stopped | hit[:, 2]
+        exit_at = np.where(hit[:, 2], touched[:, 3], stop_at)
+
+        outcomes = np.array(
+            [constants.WAITING, constants.STOPPED, constants.TARGET1, constants.TARGET2, constants.TARGET3], dtype=object
+        )
+        target_hit = outcomes[np.where(hits > 0, hits + 1, stopped)]
+        status = np.array([constants.OPENED, constants.CLOSED], dtype=object)[closed.astype(np.int64)]
+        returns = np.full(count, np.nan)
+        for i, pos in enumerate(self.positions):
+            pos.target_hit = target_hit[i]
+            pos.status = status[i]
+            if closed[i]:
+                pos._set_stats()
+                returns[i] = pos.percent - 1
+
+        index = self.td.df.index
+        self.results = pd.DataFrame({
+            'family': [family for family, _ in self.patterns],
+            'name': [p.name for _, p in self.patterns],
+            'bullish': long,
+            'entry': entry,
+            'entry_time': index[entry] if count else index[:0],
+            'strike': strike,
+            'stop': stop,
+            't1': targets[:, 0],
+            't2': targets[:, 1],
+            't3': targets[:, 2],
+            'stop_at': stop_at,
+            't1_at': np.where(hit[:, 0], touched[:, 1], -1),
+            't2_at': np.where(hit[:, 1], touched[:, 2], -1),
+            't3_at': np.where(hit[:, 2], touched[:, 3], -1),
+            'exit': exit_at,
+            'target_hit': target_hit,
+            'status': status,
+            'return': returns,
+        }, columns=self.COLUMNS)
+        return self.results
+
+    def _touch(self, long, starts, stop, targets):
+        """
+        The first candle reaching the stop and each target of every position.
+        A long is stopped by a low and reaches its targets with a high, a short the other way round.
+        Lows are negated so every search looks for a running max reaching a level.
+
+        :return: numpy.ndarray of shape ( positions, 4 ), the candle indexes of stop, t1, t2 and t3.
+        """
+        highs = _range_max_table(self.td.df[constants.HIGH].values.astype(np.float64))
+        lows = _range_max_table(-self.td.df[constants.LOW].values.astype(np.float64))
+        levels = np.column_stack((stop, targets))
+        # Column 0 ( the stop ) is reached against the trade, the targets with it.
+        upward = np.column_stack((~long, np.repeat(long[:, None], 3, axis=1)))
+        touched = np.empty(levels.shape, dtype=np.int64)
+        for column in range(levels.shape[1]):
+            up = upward[:, column]
+            touched[up, column] = _first_touch(highs, starts[up], levels[up, column])
+            touched[~up, column] = _first_touch(lows, starts[~up], -levels[~up, column])
+        return touched
+
+    def summary(self):
+        """
+        Hit rates and returns for each pattern.
+
+        positions   the number of positions.
+        closed      positions that were stopped or reached target 3 before the candles ran out.
+        stopped     the share of positions stopped before reaching target 1.
+        t1, t2, t3  the share of positions reaching each target before the stop.
+        win_rate    the share of closed positions with a positive return.
+        mean_return the mean return of the closed positions, 0.05 is 5%.
+        total_return the sum of the returns of the closed positions.
+
+        :return: pandas.DataFrame indexed by family and pattern name.
+        """
+        if self.results is None:
+            self.run()
+        r = self.results.assign(
+            closed=self.results['status'] == constants.CLOSED,
+            stopped=self.results['target_hit'] == constants.STOPPED,
+            t1=self.results['t1_at'] >= 0,
+            t2=self.results['t2_at'] >= 0,
+            t3=self.results['t3_at'] >= 0,
+            win=(self.results['return'] > 0).astype(float).where(self.results['return'].notna()),
+        )
+        grouped = r.groupby(['family', 'name'], sort=True)
+        return pd.DataFrame({
+            'positions': grouped.size(),
+            'closed': grouped['closed'].sum(),
+            'stopped': grouped['stopped'].mean(),
+            't1': grouped['t1'].mean(),
+            't2': grouped['t2'].mean(),
+            't3': grouped['t3'].mean(),
+            'win_rate': grouped['win'].mean(),
+            'mean_return': grouped['return'].mean(),
+            'total_return': grouped['return'].sum(),
+        })
@@ -1,5 +1,30 @@
-from pyharmonics.marketdata.binance_data import BinanceCandleData
-from pyharmonics.marketdata.yahoo import YahooCandleData, YahooOptionData
-from pyharmonics.marketdata.alpaca import AlpacaCandleData
+from pyharmonics.marketdata.candle_cache import CandleCache
+import importlib as _importlib
 
-__all__ = ('BinanceCandleData', 'YahooCandleData', 'YahooOptionData', 'AlpacaCandleData')  # type: ignore - wild card imports
+__all__ = ('BinanceCandleData', 'YahooCandleData', 'YahooOptionData', 'AlpacaCandleData', 'CandleCache',
+           'AsyncCandleData', 'AsyncBinanceCandleData', 'AsyncYahooCandleData', 'AsyncAlpacaCandleData')  # type: ignore - wild card imports
+
+# Each source loads its API client ( binance-connector, yfinance or alpaca-trade-api ) so it is only
+# imported the first time it is used, PEP 562.
+_LAZY = {
+    'BinanceCandleData': 'pyharmonics.marketdata.binance_data',
+    'YahooCandleData': 'pyharmonics.marketdata.yahoo',
+    'YahooOptionData': 'pyharmonics.marketdata.yahoo',
+    'AlpacaCandleData': 'pyharmonics.marketdata.alpaca',
+    'AsyncCandleData': 'pyharmonics.marketdata.async_candle_data',
+    'AsyncBinanceCandleData': 'pyharmonics.marketdata.async_candle_data',
+    'AsyncYahooCandleData': 'pyharmonics.marketdata.async_candle_data',
+    'AsyncAlpacaCandleData': 'pyharmonics.marketdata.async_candle_data'
+}
+
+
+def __getattr__(name):
+    if name not in _LAZY:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(_importlib.import_module(_LAZY[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
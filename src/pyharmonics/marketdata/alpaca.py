@@ -58,7 +58,7 @@ class AlpacaCandleData(CandleData):
         CandleData.MONTH_1: datetime.timedelta(days=30)
     }
 
-    def __init__(self, key, schema=None, time_zone='Europe/Dublin', df_index=CandleData.DTS):
+    def __init__(self, key, schema=None, time_zone='Europe/Dublin', df_index=CandleData.DTS, cache=None):
         """
         Constructor for AlpacaCandleData
 
@@ -69,6 +69,7 @@ class AlpacaCandleData(CandleData):
         :param list schema: The schema for the candle data.  If None, the default schema is used.
         :param str time_zone: The time zone to use for the data.
         :param str df_index: The index to use for the dataframe.  If None, the default index is used.
+        :param CandleCache cache: A CandleCache to keep candles on disk between calls, None fetches every candle every time.
         """
         # Binance returns a list of lists. There is no schema as such and typing must be defined in line with biances API.
         # Making the schema a paramater means it can be updated using a config and no code change.
@@ -91,6 +92,7 @@ class AlpacaCandleData(CandleData):
         self.time_zone = time_zone
         self.df = None
         self.candle_gap = None
+        self.cache = cache
         if df_index in (self.DTS, self.CLOSE_TIME):
             self.df_index = df_index
         else:
@@ -135,7 +137,15 @@ class AlpacaCandleData(CandleData):
         df = df[self.COLUMNS]  # Hold on to only the essentials and save memory
         return df
 
-    def get_candles(self, symbol: str, interval: TimeFrame, num_candles=None, start=None, end=None):
+    def get_candles(self, symbol, interval, num_candles=None, start=None, end=None):
+        """
+        Fetch candles into self.df, through the cache when there is one, see CandleData.get_candles.
+
+        >>> m.get_candles('MSFT', m.HOUR_1, num_candles=100)
+        """
+        return super().get_candles(symbol, interval, num_candles=num_candles, start=start, end=end)
+
+    def _get_candles(self, symbol: str, interval: TimeFrame, num_candles=None, start=None, end=None):
         """
         If start and end are defined all candles between those time ranges will be pulled
         and stored in self.df.  This is done using multiple calls.
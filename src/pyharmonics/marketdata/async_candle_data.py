@@ -0,0 +1,233 @@
+__author__ = 'github.com/niall-oc'
+
+from pyharmonics.marketdata.candle_base import RateLimiter
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+import functools
+import threading
+import importlib
+import asyncio
+
+
+class _Source:
+    """
+    The CandleData of an async source, imported when it is first used so that importing
+    this module does not load the API client of every source.
+    """
+    def __init__(self, module, name):
+        self.module = module
+        self.name = name
+
+    def __get__(self, instance, owner):
+        return getattr(importlib.import_module(self.module), self.name)
+
+
+class AsyncCandleData:
+    """
+    Fetch candles from an event loop.  Every AsyncCandleData shares one pool of workers, so no more than
+    max_in_flight requests are open at once across all sources, and each source shares one keep-alive
+    HTTP session between all of its instances.
+
+    Requests run through the CandleData of the source, so caching, block splitting and rate limits
+    behave exactly as they do for the synchronous classes.
+
+    >>> b = AsyncBinanceCandleData()
+    >>> df = await b.get_candles('BTCUSDT', b.HOUR_1)
+    >>> dfs = await b.get_candles_many([('BTCUSDT', b.HOUR_1), ('ETHUSDT', b.HOUR_4)], num_candles=500)
+    """
+    # The synchronous CandleData the requests run through.
+    CANDLE_DATA = None
+    # The most requests open at once across every AsyncCandleData.
+    max_in_flight = 16
+    _executor = None
+    _lock = threading.Lock()
+
+    def __init__(self, **kwargs):
+        """
+        Constructor for AsyncCandleData
+
+        :param kwargs: Passed on to the CandleData of the source, eg. time_zone, df_index or cache.
+        """
+        self.kwargs = kwargs
+        self._idle = []
+
+    def __getattr__(self, name):
+        # Interval and column names, eg. b.HOUR_1 or b.CLOSE, come from the CandleData of the source.
+        if name.isupper():
+            return getattr(self.CANDLE_DATA, name)
+        raise AttributeError(name)
+
+    @classmethod
+    def set_max_in_flight(cls, max_in_flight):
+        """
+        Change the most requests open at once across every AsyncCandleData.
+        Requests already running finish in the old pool.
+
+        >>> AsyncCandleData.set_max_in_flight(32)
+
+        :param int max_in_flight: The number of workers in the shared pool.
+        """
+        with AsyncCandleData._lock:
+            AsyncCandleData.max_in_flight = max_in_flight
+            executor, AsyncCandleData._executor = AsyncCandleData._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    @classmethod
+    def executor(cls):
+        """
+        The pool of workers shared by every AsyncCandleData.
+
+        :return: concurrent.futures.ThreadPoolExecutor
+        """
+        with AsyncCandleData._lock:
+            if AsyncCandleData._executor is None:
+                AsyncCandleData._executor = ThreadPoolExecutor(
+                    max_workers=AsyncCandleData.max_in_flight, thread_name_prefix='pyharmonics-candles'
+                )
+            return AsyncCandleData._executor
+
+    def _new_candle_data(self):
+        """
+        Create a CandleData for the source that uses the shared connection.
+
+        :return: CandleData
+        """
+        return self.CANDLE_DATA(**self.kwargs)
+
+    def _get_candles(self, symbol, interval, num_candles, start, end):
+        # A CandleData holds the state of one request, each worker takes an idle one or makes its own.
+        try:
+            candle_data = self._idle.pop()
+        except IndexError:
+            candle_data = self._new_candle_data()
+        try:
+            candle_data.get_candles(symbol, interval, num_candles=num_candles, start=start, end=end)
+            return candle_data.df
+        finally:
+            candle_data.df = None
+            self._idle.append(candle_data)
+
+    async def get_candles(self, symbol, interval, num_candles=None, start=None, end=None):
+        """
+        Fetch candles without blocking the event loop.
+
+        >>> df = await b.get_candles('BTCUSDT', b.HOUR_1, num_candles=1000)
+
+        :param symbol: The symbol to fetch.
+        :param interval: The interval to fetch.
+        :param num_candles: The number of candles to fetch.
+        :param start: The start time for a range of candles.
+        :param end: The end time for a range of candles.
+        :return: pandas.DataFrame in the same form as CandleData.df
+        """
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor(),
+            functools.partial(self._get_candles, symbol, interval, num_candles, start, end)
+        )
+
+    async def get_candles_many(self, requests, num_candles=None, start=None, end=None, return_exceptions=False):
+        """
+        Fetch candles for many symbols and intervals at once.
+
+        >>> dfs = await b.get_candles_many([('BTCUSDT', b.HOUR_1), ('ETHUSDT', b.HOUR_1)])
+        >>> dfs = await b.get_candles_many(pairs, return_exceptions=True)  # failures are returned in place
+
+        :param list requests: ( symbol, interval ) for each request.
+        :param num_candles: The number of candles to fetch for each request.
+        :param start: The start time for a range of candles.
+        :param end: The end time for a range of candles.
+        :param bool return_exceptions: Return the exception of a failed request in its place rather than raising it.
+        :return: list of pandas.DataFrame in the order of requests.
+        """
+        return await asyncio.gather(
+            *(self.get_candles(symbol, interval, num_candles=num_candles, start=start, end=end) for symbol, interval in requests),
+            return_exceptions=return_exceptions
+        )
+
+
+class AsyncBinanceCandleData(AsyncCandleData):
+    """
+    Binance candles from an event loop.  All instances share one Spot client, and so one keep-alive
+    connection pool, and one RateLimiter as Binance limits request weight per IP.
+
+    >>> b = AsyncBinanceCandleData()
+    >>> dfs = await b.get_candles_many([(symbol, b.HOUR_1) for symbol in symbols])
+    """
+    CANDLE_DATA = _Source('pyharmonics.marketdata.binance_data', 'BinanceCandleData')
+    _client = None
+    _limiter = None
+
+    def __init__(self, client=None, **kwargs):
+        """
+        Constructor for AsyncBinanceCandleData
+
+        :param client: A binance.spot.Spot to use in place of the shared client.
+        :param kwargs: Passed on to BinanceCandleData, eg. time_zone or cache.
+        """
+        super().__init__(**kwargs)
+        self.client = client
+
+    @classmethod
+    def shared(cls):
+        """
+        The Spot client and RateLimiter shared by every AsyncBinanceCandleData.
+
+        :return: tuple ( binance.spot.Spot, RateLimiter )
+        """
+        with AsyncCandleData._lock:
+            if cls._client is None:
+                client = cls.CANDLE_DATA().rc
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=AsyncCandleData.max_in_flight)
+                client.session.mount('https://', adapter)
+                cls._client = client
+                cls._limiter = RateLimiter(cls.CANDLE_DATA.WEIGHT_PER_MINUTE // 2, period=60)
+            return cls._client, cls._limiter
+
+    def _new_candle_data(self):
+        candle_data = super()._new_candle_data()
+        client, candle_data.limiter = self.shared()
+        candle_data.rc = self.client or client
+        return candle_data
+
+
+class AsyncYahooCandleData(AsyncCandleData):
+    """
+    Yahoo candles from an event loop.  yfinance already keeps one session for every Ticker.
+
+    >>> y = AsyncYahooCandleData()
+    >>> dfs = await y.get_candles_many([('MSFT', y.DAY_1), ('AAPL', y.DAY_1)])
+    """
+    CANDLE_DATA = _Source('pyharmonics.marketdata.yahoo', 'YahooCandleData')
+
+
+class AsyncAlpacaCandleData(AsyncCandleData):
+    """
+    Alpaca candles from an event loop.  All instances using the same key share one REST client,
+    and so one keep-alive connection pool.
+
+    >>> a = AsyncAlpacaCandleData({'api': '...', 'secret': '...'})
+    >>> dfs = await a.get_candles_many([('AAPL', a.HOUR_1), ('MSFT', a.HOUR_1)])
+    """
+    CANDLE_DATA = _Source('pyharmonics.marketdata.alpaca', 'AlpacaCandleData')
+    _clients = {}
+
+    def __init__(self, key, **kwargs):
+        """
+        Constructor for AsyncAlpacaCandleData
+
+        :param dict key: The Alpaca 'api' key and 'secret'.
+        :param kwargs: Passed on to AlpacaCandleData, eg. time_zone or cache.
+        """
+        super().__init__(key=key, **kwargs)
+
+    def _new_candle_data(self):
+        candle_data = super()._new_candle_data()
+        api = self.kwargs['key']['api']
+        with AsyncCandleData._lock:
+            if api not in self._clients:
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=AsyncCandleData.max_in_flight)
+                candle_data.rc._session.mount('https://', adapter)
+                self._clients[api] = candle_data.rc
+            candle_data.rc = self._clients[api]
+        return candle_data
@@ -1,7 +1,12 @@
-from pyharmonics.marketdata.candle_base import CandleData, InvalidTimeframe
+from pyharmonics.marketdata.candle_base import CandleData, InvalidTimeframe, RateLimiter
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
 from binance.spot import Spot
+from binance.error import ClientError
+from operator import itemgetter
 import datetime
+import math
 
 class BinanceCandleData(CandleData):
     """
@@ -20,10 +25,17 @@ class BinanceCandleData(CandleData):
 
     >>> m.get_candles('BTCUSDT', '1h', start=datetime.datetime(2020, 3, 21, 14, 0, 15))
     # All candle data from 21st of march 2020 until present
+
+    >>> m = BinanceCandleData(workers=8) # fetch blocks of 1000 candles 8 at a time
+    >>> m.get_candles('BTCUSDT', '1m', num_candles=100000)
     """
     # Critical Binance will not return more than 1000 candles of data per call.
     MAX_CANDLES = 1000
     SOURCE = 'Binance'
+    # Binance allows 6000 request weight per minute for each IP.
+    WEIGHT_PER_MINUTE = 6000
+    # HTTP status codes Binance uses to ask for a back off, 418 once an IP is banned for ignoring 429s.
+    BACK_OFF = (429, 418)
     INTERVALS = {
         CandleData.MIN_1: '1m',
         CandleData.MIN_3: '3m',
@@ -41,13 +53,18 @@ class BinanceCandleData(CandleData):
         CandleData.MONTH_1: '1M'
     }
 
-    def __init__(self, schema=None, time_zone='Europe/Dublin', df_index=CandleData.DTS):
+    def __init__(self, schema=None, time_zone='Europe/Dublin', df_index=CandleData.DTS, cache=None,
+                 workers=1, weight_per_minute=WEIGHT_PER_MINUTE // 2, retries=3):
         """
         Constructor for BinanceCandleData
 
         :param schema: The schema for the candle data.  If None, the default schema is used.
         :param time_zone: The time zone to use for the data.
         :param df_index: The index to use for the dataframe.  If None, the default index is used.
+        :param cache: A CandleCache to keep candles on disk between calls, None fetches every candle every time.
+        :param workers: The number of blocks of candles fetched at the same time, 1 fetches them one after another.
+        :param weight_per_minute: The request weight this object may use each minute, half the Binance limit by default.
+        :param retries: How often a block is requested again after Binance asks for a back off.
         """
         # Binance returns a list of lists. There is no schema as such and typing must be defined in line with biances API.
         # Making the schema a paramater means it can be updated using a config and no code change.
@@ -75,6 +92,10 @@ class BinanceCandleData(CandleData):
         self.time_zone = time_zone
         self.df = None
         self.candle_gap = None
+        self.cache = cache
+        self.workers = workers
+        self.limiter = RateLimiter(weight_per_minute, period=60)
+        self.retries = retries
         if df_index in (self.DTS, self.CLOSE_TIME):
             self.df_index = df_index
         else:
@@ -82,19 +103,34 @@ class BinanceCandleData(CandleData):
 
     def _to_dataframe(self, row_data):
         """
-        Converts the raw data from the API into a pandas dataframe.
+        Parses the raw data from the API into the indexed dataframe reset_index would leave.
+        Only the COLUMNS are read, each straight into one typed array, and the rows are sorted
+        and de-duplicated once on those arrays.
+
+        >>> m._to_dataframe([[1584799200000, '5916.61', ..., 1584802799999, ...], ...])
 
-        :param row_data: The raw data from the API.
+        :param row_data: The raw data from the API, blocks may overlap and arrive in any order.
         :return: The pandas dataframe
         """
-        df = pd.DataFrame(data=row_data, columns=self.columns)
-
-        for col in self.schema:
-            df[col['name']] = df[col['name']].astype(col['type'])
-
-        df[self.CLOSE_TIME] = df[self.CLOSE_TIME].map(lambda x: int(x / 1000))   # binance epoch is millisecond
-        df[self.DTS] = pd.to_datetime(df[self.CLOSE_TIME], unit='s', utc=True).dt.tz_convert(self.time_zone)
-        return df[self.COLUMNS]  # Hold on to only the essentials and save memory
+        types = {c['name']: c['type'] for c in self.schema}
+        columns = {}
+        for column in self.COLUMNS[:-1]:  # DTS is derived from CLOSE_TIME
+            position = self.columns.index(column)
+            columns[column] = np.fromiter(map(itemgetter(position), row_data), dtype=types[column], count=len(row_data))
+        columns[self.CLOSE_TIME] //= 1000  # binance epoch is millisecond
+
+        close_time = columns[self.CLOSE_TIME]
+        if len(close_time) > 1 and not (close_time[1:] > close_time[:-1]).all():
+            # Sort on close time, then on every other column so identical rows sit side by side.
+            order = np.lexsort([values for column, values in columns.items() if column != self.CLOSE_TIME] + [close_time])
+            columns = {column: values[order] for column, values in columns.items()}
+            keep = np.ones(len(order), dtype=bool)
+            keep[1:] = np.any([values[1:] != values[:-1] for values in columns.values()], axis=0)
+            columns = {column: values[keep] for column, values in columns.items()}
+
+        columns[self.DTS] = pd.to_datetime(columns[self.CLOSE_TIME], unit='s', utc=True).tz_convert(self.time_zone)
+        index = pd.Index(columns[self.df_index], name=self.INDEX)
+        return pd.DataFrame(columns, index=index, copy=False)
 
     def _datetime_to_epoch(self, t):
         """
@@ -132,6 +168,14 @@ class BinanceCandleData(CandleData):
         return super()._epoch_to_datetime(epoch)
 
     def get_candles(self, symbol, interval, num_candles=None, start=None, end=None):
+        """
+        Fetch candles into self.df, through the cache when there is one, see CandleData.get_candles.
+
+        >>> m.get_candles('BTCUSDT', m.HOUR_1, num_candles=100)
+        """
+        return super().get_candles(symbol, interval, num_candles=num_candles, start=start, end=end)
+
+    def _get_candles(self, symbol, interval, num_candles=None, start=None, end=None):
         """
         If start and end are defined all candles between those time ranges will be pulled
         and stored in self.df.  This is done using multiple calls.
@@ -159,7 +203,12 @@ class BinanceCandleData(CandleData):
         self._set_params(symbol, interval, num_candles=num_candles, start=start, end=end)
         # Start and end are explicit.
 
-        if self.start and self.end:
+        if self._can_split() and self.start and self.end:
+            row_data = self._get_candle_blocks(self._range_blocks(self.start, self.end))
+        elif self._can_split() and self.num_candles > self.MAX_CANDLES:
+            time_index = self._datetime_to_epoch(self.end or datetime.datetime.now())
+            row_data = self._get_candle_blocks(self._count_blocks(time_index, self.num_candles))
+        elif self.start and self.end:
             start_index = self.start
             end_index = self.end
             while start_index <= end_index:
@@ -183,8 +232,6 @@ class BinanceCandleData(CandleData):
             # Start + num_candles  OR (end OR now ) - num_candles is returned
             row_data = self._get_candle_block(start=self.start, end=self.end, num_candles=self.num_candles)
         self.df = self._to_dataframe(row_data)
-        row_data = None
-        self.reset_index()
 
     def _set_params(self, symbol, interval, num_candles=None, start=None, end=None):
         """
@@ -202,6 +249,72 @@ class BinanceCandleData(CandleData):
         self.start = self._datetime_to_epoch(start)
         self.end = self._datetime_to_epoch(end)
 
+    def _can_split(self):
+        """
+        Blocks can be fetched concurrently when more than one worker is allowed and every candle of the
+        interval has the same length, months do not.
+        """
+        return self.workers > 1 and self.interval != self.MONTH_1
+
+    def _range_blocks(self, start, end):
+        """
+        Split start to end into blocks of MAX_CANDLES candles, oldest first.
+
+        >>> m._range_blocks(0, 7199999)  # 2 hours of 1m candles
+        [(0, 7199999, 1000)]
+
+        :param int start: The start time in epoch milliseconds.
+        :param int end: The end time in epoch milliseconds.
+        :return: list of ( start, end, num_candles ) for _get_candle_block.
+        """
+        span = self.MAX_CANDLES * self.INTERVAL_SECONDS[self.interval] * 1000
+        return [(block, min(block + span - 1, end), self.MAX_CANDLES) for block in range(start, end + 1, span)]
+
+    def _count_blocks(self, end, num_candles):
+        """
+        Split the num_candles candles up to end into blocks of MAX_CANDLES candles, oldest first.
+        Each block asks for the candles up to its own end time so no block waits on another.
+
+        >>> m._count_blocks(1584801615000, 2500)
+
+        :param int end: The end time in epoch milliseconds.
+        :param int num_candles: The number of candles.
+        :return: list of ( start, end, num_candles ) for _get_candle_block.
+        """
+        span = self.MAX_CANDLES * self.INTERVAL_SECONDS[self.interval] * 1000
+        blocks = [
+            (None, end - i * span, min(self.MAX_CANDLES, num_candles - i * self.MAX_CANDLES))
+            for i in range(math.ceil(num_candles / self.MAX_CANDLES))
+        ]
+        return blocks[::-1]
+
+    def _get_candle_blocks(self, blocks):
+        """
+        Fetch blocks of candles in a pool of workers and stitch them together in order.
+
+        :param list blocks: ( start, end, num_candles ) for each block, oldest first.
+        :return: The data from the API.
+        """
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            results = pool.map(lambda block: self._get_candle_block(*block), blocks)
+            return [row for block_data in results for row in block_data]
+
+    def _block_weight(self, num_candles):
+        """
+        The request weight Binance charges for klines, it grows with the limit.
+
+        :param int num_candles: The limit of the request.
+        :return: int
+        """
+        limit = num_candles or 500
+        if limit < 100:
+            return 1
+        elif limit < 500:
+            return 2
+        elif limit <= 1000:
+            return 5
+        return 10
+
     def _get_candle_block(self, start=None, end=None, num_candles=None):
         """
         Calls binance API to get a block of candle data.
@@ -217,14 +330,21 @@ class BinanceCandleData(CandleData):
         """
         limit = num_candles
 
-        data = self.rc.klines(
-            self.symbol,
-            self.INTERVALS[self.interval],
-            startTime=start,
-            endTime=end,
-            limit=limit
-        )
-        return data
+        for attempt in range(self.retries + 1):
+            self.limiter.acquire(self._block_weight(limit))
+            try:
+                return self.rc.klines(
+                    self.symbol,
+                    self.INTERVALS[self.interval],
+                    startTime=start,
+                    endTime=end,
+                    limit=limit
+                )
+            except ClientError as e:
+                if e.status_code not in self.BACK_OFF or attempt == self.retries:
+                    raise
+                # Every worker backs off for as long as Binance asks.
+                self.limiter.pause(float((e.header or {}).get('Retry-After', 1)))
 
 if __name__ == '__main__':
     # Debugging
@@ -7,11 +7,66 @@ Created on Mon Nov  1 17:02:46 2021
 """
 import abc
 import datetime
+import threading
+import time
+import pandas as pd
 from pyharmonics import constants
 
 class InvalidTimeframe(Exception):
     pass
 
+class RateLimiter:
+    """
+    A token bucket shared by the threads calling an API.
+    capacity units of weight are available per period and refill continuously.
+
+    >>> limiter = RateLimiter(1200, period=60)
+    >>> limiter.acquire(5)  # returns once 5 units of weight are available
+    >>> limiter.pause(30)   # the API asked for a break, every caller waits about 30 seconds
+    """
+    def __init__(self, capacity, period=60.0):
+        """
+        Constructor for RateLimiter
+
+        :param float capacity: The weight allowed per period.
+        :param float period: The period in seconds.
+        """
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, weight=1):
+        """
+        Block until the weight is available and take it.
+
+        :param float weight: The weight of the request about to be made.
+        """
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= weight:
+                    self.tokens -= weight
+                    return
+                wait = (weight - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """
+        Empty the bucket so no weight is available for about the given number of seconds.
+
+        :param float seconds: How long the API asked callers to back off.
+        """
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.tokens, -seconds * self.rate)
+
 class CandleData(abc.ABC):
     """
     ALL data apis will convert Kline/candle/trend data into a pandas dataframe.
@@ -46,6 +101,30 @@ class CandleData(abc.ABC):
     MONTH_3 = constants.MONTH_3
     MONTH_6 = constants.MONTH_6
     SOURCE = None
+    # The shortest length of each interval in seconds, months are taken as 28 days.
+    # Dividing elapsed time by these never under counts the candles formed.
+    INTERVAL_SECONDS = {
+        MIN_1: 60,
+        MIN_3: 180,
+        MIN_5: 300,
+        MIN_10: 600,
+        MIN_15: 900,
+        MIN_30: 1800,
+        MIN_45: 2700,
+        HOUR_1: 3600,
+        HOUR_2: 7200,
+        HOUR_4: 14400,
+        HOUR_8: 28800,
+        DAY_1: 86400,
+        DAY_3: 259200,
+        DAY_5: 432000,
+        WEEK_1: 604800,
+        MONTH_1: 2419200,
+        MONTH_3: 7257600,
+        MONTH_6: 14515200
+    }
+    # A CandleCache, see pyharmonics.marketdata.candle_cache
+    cache = None
 
     def reset_index(self, index=None):
         """
@@ -81,7 +160,7 @@ class CandleData(abc.ABC):
         self.end = end
 
     @abc.abstractmethod
-    def get_candles(self):
+    def get_candles(self, symbol, interval, num_candles=None, start=None, end=None):
         """
         Set paramaters and convert dates ( especially tricky with binance epoch microseconds. )
 
@@ -95,10 +174,54 @@ class CandleData(abc.ABC):
         None             time        None        default candles ( starting from start )
         None             time        time        candles from start until end ( default is ignored)
 
+        Every source overrides get_candles.  A source that fetches in _get_candles can return
+        super().get_candles(...) to fetch through the cache, as Binance, Yahoo and Alpaca do.
+
+        With a cache, a request for the latest candles ( no start or end ) that the cache already holds
+        only fetches the candles formed since the last one cached. Every other request is fetched in full
+        and merged into the cache.
+
         >>> bc.get_candles('BTCUSDT', BinanceCandleData.HOUR_1, num_candles=100)
         >>> bc.get_candles('BTCUSDT', BinanceCandleData.HOUR_1, start=datetime.datetime(2021, 1, 1))
         >>> bc.get_candles('BTCUSDT', BinanceCandleData.HOUR_1, end=datetime.datetime(2021, 1, 1))
 
+        :param symbol: The symbol to fetch.
+        :param interval: The interval to fetch.
+        :param num_candles: The number of candles to fetch.
+        :param start: The start time to fetch.
+        :param end: The end time to fetch.
+        """
+        if self.cache is None:
+            return self._get_candles(symbol, interval, num_candles=num_candles, start=start, end=end)
+
+        cached = self.cache.load(self.SOURCE, symbol, interval, self.time_zone)
+        wanted = num_candles or self.MAX_CANDLES
+        fetched = 0
+        if cached is not None and start is None and end is None and interval in self.INTERVAL_SECONDS:
+            since = int(cached[self.CLOSE_TIME].iloc[-1])
+            # Fetch the last cached candle again, it may still have been forming when it was cached.
+            missing = max(0, int((time.time() - since) // self.INTERVAL_SECONDS[interval])) + 2
+            if len(cached) >= wanted and missing < wanted:
+                self._get_latest_candles(symbol, interval, missing, since)
+                fetched = len(self.df)
+                merged = self._merge_candles(cached)
+                if len(merged) >= wanted:
+                    self.cache.save(self.SOURCE, symbol, interval, merged)
+                    self.cache.record(True, fetched)
+                    self._set_params(symbol, interval, num_candles=num_candles)
+                    self.df = merged[-wanted:]
+                    return
+                # The latest candles did not join on to the cached candles, fetch them all.
+
+        self._get_candles(symbol, interval, num_candles=num_candles, start=start, end=end)
+        self.cache.record(False, fetched + len(self.df))
+        self.cache.save(self.SOURCE, symbol, interval, self._merge_candles(cached))
+
+    def _get_candles(self, symbol, interval, num_candles=None, start=None, end=None):
+        """
+        Fetch candles from the source into self.df, see get_candles.
+        Only sources that call CandleData.get_candles implement it.
+
         :param symbol: The symbol to fetch.
         :param interval: The interval to fetch.
         :param num_candles: The number of candles to fetch.
@@ -107,6 +230,40 @@ class CandleData(abc.ABC):
         """
         raise NotImplementedError("Specific to api and cannot be general")
 
+    def _get_latest_candles(self, symbol, interval, num_candles, since):
+        """
+        Fetch the latest candles into self.df to top up the cache.
+
+        :param symbol: The symbol to fetch.
+        :param interval: The interval to fetch.
+        :param int num_candles: At least as many candles as have formed since the last cached candle.
+        :param int since: The CLOSE_TIME of the last cached candle.
+        """
+        self._get_candles(symbol, interval, num_candles=num_candles)
+
+    def _merge_candles(self, cached):
+        """
+        Merge the candles just fetched into self.df with cached candles.
+        Fetched candles replace cached candles over the span they cover. The cache only ever holds one
+        unbroken run of candles, when the two do not overlap the more recent run is kept.
+
+        :param pandas.DataFrame cached: Candles from the cache or None.
+        :return: pandas.DataFrame the merged candles in the same form as self.df.
+        """
+        fetched = self.df
+        if cached is None or not len(fetched) or not len(cached):
+            return fetched
+        close_time = cached[self.CLOSE_TIME].values
+        first, last = fetched[self.CLOSE_TIME].iloc[0], fetched[self.CLOSE_TIME].iloc[-1]
+        if first > close_time[-1]:
+            return fetched
+        if last < close_time[0]:
+            return cached
+        self.df = pd.concat([cached[close_time < first], fetched, cached[close_time > last]], ignore_index=True)
+        self.reset_index()
+        merged, self.df = self.df, fetched
+        return merged
+
     def _datetime_to_epoch(self, t):
         """
         datetime to epoch in seconds
@@ -0,0 +1,145 @@
+__author__ = 'github.com/niall-oc'
+
+from pyharmonics import constants
+import numpy as np
+import pandas as pd
+import threading
+import tempfile
+import os
+
+
+class CandleCache:
+    """
+    Persist candles on disk per ( source, symbol, interval ) so CandleData only fetches what it is missing.
+    Candles are kept as a structured NumPy array in a .npy file, one file per symbol and interval,
+    and are read back through a memory map.
+
+    >>> cache = CandleCache('~/.pyharmonics/candles')
+    >>> b = BinanceCandleData(cache=cache)
+    >>> b.get_candles('BTCUSDT', b.HOUR_1)  # fetches 1000 candles
+    >>> b.get_candles('BTCUSDT', b.HOUR_1)  # fetches the last few candles only
+    >>> cache.stats
+    {'hits': 1, 'misses': 1, 'fetched': 1002}
+    """
+    PRICE_COLUMNS = [constants.OPEN, constants.HIGH, constants.LOW, constants.CLOSE, constants.VOLUME, constants.CLOSE_TIME]
+
+    def __init__(self, directory='~/.pyharmonics/candles'):
+        """
+        Constructor for CandleCache
+
+        :param str directory: The directory holding the cache files, it is created if needed.
+        """
+        self.directory = os.path.expanduser(directory)
+        os.makedirs(self.directory, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self.fetched = 0
+        self._lock = threading.Lock()
+
+    @property
+    def stats(self):
+        """
+        hits are requests answered from the cache with at most a top up of the latest candles.
+        misses are requests fetched in full from the source.
+        fetched is the number of candles fetched from the source.
+
+        :return: dict
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'fetched': self.fetched}
+
+    def record(self, hit, fetched):
+        """
+        Count a request against the cache.
+
+        :param bool hit: True if the request was answered from the cache.
+        :param int fetched: The number of candles fetched from the source.
+        """
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            self.fetched += fetched
+
+    def path(self, source, symbol, interval):
+        """
+        The cache file for a symbol and interval.
+        Minute and month intervals differ only by case ( 1m and 1M ) so months are spelt out.
+
+        >>> cache.path('Binance', 'BTCUSDT', '1M')
+        '/home/me/.pyharmonics/candles/Binance/BTCUSDT_1mo.npy'
+
+        :param str source: The SOURCE of the CandleData.
+        :param str symbol: The symbol.
+        :param str interval: The interval.
+        :return: str
+        """
+        return os.path.join(self.directory, str(source), f"{symbol}_{interval.replace('M', 'mo')}.npy")
+
+    def load(self, source, symbol, interval, time_zone):
+        """
+        Read cached candles in the CandleData format, before reset_index is applied.
+
+        :param str source: The SOURCE of the CandleData.
+        :param str symbol: The symbol.
+        :param str interval: The interval.
+        :param str time_zone: The time zone for the DTS column.
+        :return: pandas.DataFrame or None if nothing is cached.
+        """
+        path = self.path(source, symbol, interval)
+        if not os.path.exists(path):
+            return None
+        candles = np.load(path, mmap_mode='r')
+        df = pd.DataFrame({column: np.array(candles[column]) for column in self.PRICE_COLUMNS})
+        df[constants.DTS] = pd.to_datetime(np.array(candles[constants.DTS])).tz_localize('UTC').tz_convert(time_zone)
+        return df
+
+    def save(self, source, symbol, interval, df):
+        """
+        Replace the cached candles for a symbol and interval.
+        The file is written beside the old one and moved into place, so a reader never sees half a file.
+
+        :param str source: The SOURCE of the CandleData.
+        :param str symbol: The symbol.
+        :param str interval: The interval.
+        :param pandas.DataFrame df: Candles with the CandleData COLUMNS.
+        """
+        dts = df[constants.DTS]
+        if dts.dt.tz is not None:
+            dts = dts.dt.tz_convert('UTC').dt.tz_localize(None)
+        dts = dts.to_numpy()
+        candles = np.empty(
+            len(df),
+            dtype=[(column, df[column].to_numpy().dtype) for column in self.PRICE_COLUMNS] + [(constants.DTS, dts.dtype)]
+        )
+        for column in self.PRICE_COLUMNS:
+            candles[column] = df[column].to_numpy()
+        candles[constants.DTS] = dts
+
+        path = self.path(source, symbol, interval)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        handle, temp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.npy')
+        with os.fdopen(handle, 'wb') as f:
+            np.save(f, candles)
+        os.replace(temp, path)
+
+    def clear(self, source=None, symbol=None, interval=None):
+        """
+        Remove a cached symbol and interval, or everything when no symbol is given.
+
+        >>> cache.clear('Binance', 'BTCUSDT', '1h')
+        >>> cache.clear()
+
+        :param str source: The SOURCE of the CandleData.
+        :param str symbol: The symbol.
+        :param str interval: The interval.
+        """
+        if symbol is not None:
+            path = self.path(source, symbol, interval)
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith('.npy'):
+                    os.remove(os.path.join(root, name))
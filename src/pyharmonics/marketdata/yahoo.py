@@ -3,6 +3,7 @@ __author__ = 'github.com/niall-oc'
 from pyharmonics.marketdata.candle_base import CandleData
 import yfinance as yf
 import pandas as pd
+import datetime
 
 class YahooOptionChain:
     """
@@ -124,7 +125,7 @@ class YahooCandleData(CandleData):
         CandleData.MONTH_3: 'max'
     }
 
-    def __init__(self, schema=None, time_zone='Europe/Dublin', df_index=CandleData.DTS):
+    def __init__(self, schema=None, time_zone='Europe/Dublin', df_index=CandleData.DTS, cache=None):
         """
         Constructor for YahooCandleData
 
@@ -135,6 +136,7 @@ class YahooCandleData(CandleData):
         :param schema: The schema for the candle data.  If None, the default schema is used.
         :param time_zone: The time zone to use for the data.
         :param df_index: The index to use for the dataframe.  If None, the default index is used.
+        :param cache: A CandleCache to keep candles on disk between calls, None fetches every candle every time.
         """
         # Binance returns a list of lists. There is no schema as such and typing must be defined in line with biances API.
         # Making the schema a paramater means it can be updated using a config and no code change.
@@ -153,12 +155,21 @@ class YahooCandleData(CandleData):
         self.time_zone = time_zone
         self.df = None
         self.candle_gap = None
+        self.cache = cache
         if df_index in (self.DTS, self.CLOSE_TIME):
             self.df_index = df_index
         else:
             raise ValueError(f'df_index must be one of "{self.DTS}" or "{self.CLOSE_TIME}"')
 
     def get_candles(self, symbol, interval, num_candles=None, start=None, end=None):
+        """
+        Fetch candles into self.df, through the cache when there is one, see CandleData.get_candles.
+
+        >>> m.get_candles('MSFT', m.DAY_1, num_candles=100)
+        """
+        return super().get_candles(symbol, interval, num_candles=num_candles, start=start, end=end)
+
+    def _get_candles(self, symbol, interval, num_candles=None, start=None, end=None):
         """
         Get the candle data from Yahoo Finance for the given asset and interval.
 
@@ -189,6 +200,18 @@ class YahooCandleData(CandleData):
         self.df[self.DTS] = pd.to_datetime(self.df[self.CLOSE_TIME], unit='s', utc=True).dt.tz_convert(self.time_zone)
         self.reset_index()
 
+    def _get_latest_candles(self, symbol, interval, num_candles, since):
+        """
+        Yahoo has no candle count, fetch from the last cached candle rather than the full period.
+
+        :param symbol: The symbol to fetch.
+        :param interval: The interval to fetch.
+        :param int num_candles: At least as many candles as have formed since the last cached candle.
+        :param int since: The CLOSE_TIME of the last cached candle.
+        """
+        start = datetime.datetime.fromtimestamp(since, tz=datetime.timezone.utc)
+        self._get_candles(symbol, interval, num_candles=num_candles, start=start)
+
     def _trim_data(self):
         """
         Trim the data to the number of candles requested.
@@ -202,6 +225,5 @@ class YahooCandleData(CandleData):
             self.df = self.df[max(len(self.df) - self.num_candles, 0):]
 
 if __name__ == '__main__':
-    import datetime
     y = YahooCandleData()
     y.get_candles('MSFT', y.MIN_1, end=datetime.datetime.today())
@@ -12,6 +12,8 @@ class HarmonicPattern(abc.ABC):
 
     ABCD, XABCD ( Gartley, Bat, Butterfly, Crab, Cypher, Shark, 5-0, etc. )
     """
+    __slots__ = ()
+
     @abc.abstractmethod
     def to_dict(self):
         raise NotImplementedError
@@ -26,7 +28,15 @@ class ABCPattern(HarmonicPattern):
     continuing in the original direction.
 
     .382, .5, .618, .786, .886, 1.13, 1.141, 1.618 are common retracement levels.
+
+    Searches create many thousands of patterns, so they have no __dict__.  A pattern found by a search
+    holds the candle indexes of its points and only looks up their times, and its p_id, when first read.
     """
+    __slots__ = (
+        'symbol', 'interval', 'indexes', '_x', '_times', 'y', 'name', 'retraces', 'formed', 'bullish',
+        'abc_extensions', 'hop', 'completion_min_price', 'completion_max_price', '_p_id'
+    )
+
     def __init__(
         self,
         symbol,
@@ -36,25 +46,35 @@ class ABCPattern(HarmonicPattern):
         name: str,
         retraces: dict,
         formed: bool,
-        bullish: bool
+        bullish: bool,
+        times=None
     ):
         """
         Constructor for ABCPattern.
 
         >>> p = ABCPattern('BTCUSDT', '1h', (1, 2), (3, 4), 'Gartley', {0.382: 1, 0.618: 2}, True, True)
+        >>> p = ABCPattern('BTCUSDT', '1h', [29, 42, 46], y, 'ABC', retraces, True, True, times=technicals.df.index)
 
         :param str symbol: The symbol for the pattern.
         :param str interval: The interval for the pattern.
-        :param tuple x: The x points for the pattern.
+        :param tuple x: The x points for the pattern, candle indexes when times is given.
         :param tuple y: The y points for the pattern.
         :param str name: The name of the pattern.
         :param dict retraces: retraces are calculated from the y points.
         :param bool formed: True if the pattern is formed.
         :param bool bullish: True if the pattern is bullish.
+        :param times: The candle times x indexes, a pandas.Index or technicals.times, looked up when x is first read.
         """
         self.symbol = symbol
         self.interval = interval
-        self.x = x
+        if times is None:
+            self.indexes = None
+            self._x = x
+        else:
+            self.indexes = x
+            self._x = None
+        self._times = times
+        self._p_id = None
         self.y = y
         self.name = name
         self.retraces = retraces
@@ -66,7 +86,43 @@ class ABCPattern(HarmonicPattern):
         self.hop = max(self.hop, 0.0)
         self.completion_min_price = max(self.completion_min_price, 0.0)
         self.completion_max_price = max(self.completion_max_price, 0.0)
-        self._set_hash()
+
+    @property
+    def x(self):
+        """
+        The times of the pattern points.
+        """
+        if self._x is None:
+            self._x = list(self._times[self.indexes])
+            self._times = None
+        return self._x
+
+    @x.setter
+    def x(self, x):
+        self._x = x
+        self._times = None
+
+    @property
+    def p_id(self):
+        """
+        A unique pattern id, calculated the first time it is read.
+
+        The id is still the SHA-256 of the pattern times and prices so ids saved by earlier versions keep
+        matching.  It is only worked out when read, searches compare patterns without it.
+        """
+        if self._p_id is None:
+            seed = f"{self.bullish}{self.name}{self.x[:-2]}{self.y[:-2]}{self.completion_min_price}{self.completion_max_price}"
+            self._p_id = sha256(seed.encode()).hexdigest()
+        return self._p_id
+
+    def __getstate__(self):
+        # Look up the times first so the candle times are not pickled with every pattern.
+        self.x
+        return {slot: getattr(self, slot) for slot in ABCPattern.__slots__}
+
+    def __setstate__(self, state):
+        for slot, value in state.items():
+            setattr(self, slot, value)
 
     def to_dict(self):
         """
@@ -93,13 +149,6 @@ class ABCPattern(HarmonicPattern):
         args = [f'{k}={repr(v)}' for k, v in self.to_dict().items()]
         return f"{self.__class__.__name__}({', '.join(args)})"
 
-    def _set_hash(self):
-        """
-        Set a unique pattern id for this pattern.
-        """
-        seed = f"{self.bullish}{self.name}{self.x[:-2]}{self.y[:-2]}{self.completion_min_price}{self.completion_max_price}"
-        self.p_id = sha256(seed.encode()).hexdigest()
-
     def _set_CD_leg_extensions(self):
         """
         Using the ABC component of a pattern, calculate the BC leg projection and extension levels.
@@ -124,6 +173,8 @@ class ABCDPattern(ABCPattern):
     A price moves in an up or down swing and retraces to a fibonacci level before
     continuing in the opposite direction.
     """
+    __slots__ = ()
+
     def _set_completion_price(self):
         """
         Calculates the completion price range for this pattern based off the XAB or XCD pattern completeion retrace.
@@ -150,6 +201,8 @@ class XABCDPattern(ABCPattern):
     A price moves in an up or down swing and retraces to a fibonacci level before
     continuing in the opposite direction.
     """
+    __slots__ = ()
+
     def _set_completion_price(self):
         """
         Calculates the completion price range for this pattern based off the XAB or XCD pattern completeion retrace.
@@ -203,6 +256,8 @@ class Divergence:
     A divergence is a disagreement between the price and an indicator.
     While the price makes a new high or low, the indicator does not.
     """
+    __slots__ = ('indicator', 'name', 'x', 'y', 'ind_x', 'ind_y', 'bullish')
+
     def __init__(
         self,
         indicator: str,
@@ -1,5 +1,4 @@
-from .harmonic import HarmonicPlotter, PositionPlotter, Plotter
-from .option import OptionPlotter, OptionSurface
+import importlib as _importlib
 
 __all__ = (
     'HarmonicPlotter',
@@ -8,3 +7,24 @@ __all__ = (
     'OptionPlotter',
     'OptionSurface'
 )
+
+# Plotters load plotly, they are imported the first time they are used, PEP 562.
+_LAZY = {
+    'HarmonicPlotter': 'pyharmonics.plotter.harmonic',
+    'Plotter': 'pyharmonics.plotter.harmonic',
+    'PositionPlotter': 'pyharmonics.plotter.harmonic',
+    'OptionPlotter': 'pyharmonics.plotter.option',
+    'OptionSurface': 'pyharmonics.plotter.option'
+}
+
+
+def __getattr__(name):
+    if name not in _LAZY:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(_importlib.import_module(_LAZY[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
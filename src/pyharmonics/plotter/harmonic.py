@@ -35,6 +35,8 @@ class PlotterBase(abc.ABC):
         self.technicals = technicals
         self.title = title or 'chart'
         self.time_horizon = time_horizon
+        # Every indicator and moving average can be plotted.
+        technicals.require()
         self.df = technicals.df
         self.date_series = self.df.index
         self.plot_ema = plot_ema
@@ -277,7 +279,7 @@ class PlotterBase(abc.ABC):
             go.Scatter(
                 mode="markers",
                 x=self.df.index.values[self.technicals.lows],
-                y=[i[1] for i in self.technicals.peak_data if not i[2]],
+                y=self.technicals.peak_lows['price'],
                 line=dict(color='lightgreen', width=1)
             )
         )
@@ -286,7 +288,7 @@ class PlotterBase(abc.ABC):
             go.Scatter(
                 mode="markers",
                 x=self.df.index.values[self.technicals.highs],
-                y=[i[1] for i in self.technicals.peak_data if i[2]],
+                y=self.technicals.peak_highs['price'],
                 line=dict(color='#ff7766', width=1)
             )
         )
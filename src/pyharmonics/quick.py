@@ -1,14 +1,16 @@
-from pyharmonics.marketdata import YahooCandleData, BinanceCandleData, YahooOptionData
 from pyharmonics.technicals import OHLCTechnicals, Technicals
 from pyharmonics.search import HarmonicSearch, DivergenceSearch
 from pyharmonics.positions import Position
-from pyharmonics.plotter import HarmonicPlotter, PositionPlotter, OptionPlotter
-from pyharmonics import constants
+from pyharmonics import constants, marketdata, plotter
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+import os
+import time
 
 
 def play_position(hs, pattern, strike, dollar_amount):
     pos = Position(pattern, strike, dollar_amount)
-    p = PositionPlotter(hs.td, pos)
+    p = plotter.PositionPlotter(hs.td, pos)
     p.add_peaks()
     p.show()
 
@@ -23,7 +25,7 @@ def whats_new(cd, limit_to=-1):
     t = OHLCTechnicals(cd.df, cd.symbol, cd.interval)
     hs = HarmonicSearch(t)
     hs.search(limit_to=limit_to)
-    p = HarmonicPlotter(t)
+    p = plotter.HarmonicPlotter(t)
     d = DivergenceSearch(t)
     d.search()
     p.add_peaks()
@@ -49,7 +51,7 @@ def whats_new_binance(symbol, interval, limit_to=-1, candles=1000):
     :param candles: The number of candles to fetch.
     :return: The HarmonicSearch object containing the results.
     """
-    bc = BinanceCandleData()
+    bc = marketdata.BinanceCandleData()
     bc.get_candles(symbol, interval, candles)
     return whats_new(bc, limit_to=limit_to)
 
@@ -69,7 +71,7 @@ def whats_new_yahoo(symbol, interval, limit_to=-1, candles=1000):
     :param candles: The number of candles to fetch.
     :return: The HarmonicSearch object containing the results.
     """
-    yc = YahooCandleData()
+    yc = marketdata.YahooCandleData()
     yc.get_candles(symbol, interval, candles)
     return whats_new(yc, limit_to=limit_to)
 
@@ -85,7 +87,7 @@ def whats_forming(cd, limit_to=10, percent_complete=0.8):
     t = OHLCTechnicals(cd.df, cd.symbol, cd.interval)
     hs = HarmonicSearch(t)
     hs.forming(limit_to=limit_to, percent_c_to_d=percent_complete)
-    p = HarmonicPlotter(t)
+    p = plotter.HarmonicPlotter(t)
     d = DivergenceSearch(t)
     d.search()
     p.add_peaks()
@@ -113,7 +115,7 @@ def whats_forming_binance(symbol, interval, limit_to=10, percent_complete=0.8, c
     :param candles: The number of candles to fetch.
     :return: The HarmonicSearch object containing the results.
     """
-    bc = BinanceCandleData()
+    bc = marketdata.BinanceCandleData()
     bc.get_candles(symbol, interval, candles)
     return whats_forming(bc, limit_to=limit_to, percent_complete=percent_complete)
 
@@ -134,7 +136,7 @@ def whats_forming_yahoo(symbol, interval, limit_to=10, percent_complete=0.8, can
     :param candles: The number of candles to fetch.
     :return: The HarmonicSearch object containing the results.
     """
-    yc = YahooCandleData()
+    yc = marketdata.YahooCandleData()
     yc.get_candles(symbol, interval, candles)
     return whats_forming(yc, limit_to=limit_to, percent_complete=percent_complete)
 
@@ -147,9 +149,9 @@ def whats_options_volume(symbol):
     :param symbol: The symbol to search.
     :return: The YahooOptionData object containing the results.
     """
-    yo = YahooOptionData(symbol)
+    yo = marketdata.YahooOptionData(symbol)
     yo.analyse_options(trend='volume')
-    p = OptionPlotter(yo, yo.ticker.options[0])
+    p = plotter.OptionPlotter(yo, yo.ticker.options[0])
     p.show()
     return yo
 
@@ -162,8 +164,150 @@ def whats_options_interest(symbol):
     :param symbol: The symbol to search.
     :return: The YahooOptionData object containing the results.
     """
-    yo = YahooOptionData(symbol)
+    yo = marketdata.YahooOptionData(symbol)
     yo.analyse_options()
-    p = OptionPlotter(yo, yo.ticker.options[0])
+    p = plotter.OptionPlotter(yo, yo.ticker.options[0])
     p.show()
     return yo
+
+def _fetch_candles(source, symbol, interval, candles):
+    """
+    Fetch candles in a scan thread, each fetch gets its own CandleData object.
+    """
+    cd = source()
+    cd.get_candles(symbol, interval, candles)
+    return cd.df
+
+def _search_candles(df, symbol, interval, limit_to, percent_complete, divergence_limit_to):
+    """
+    Build technicals and search one set of candles in a scan worker process.
+    Only the patterns are returned, the technicals stay in the worker.
+    """
+    # Nothing is plotted, only the indicators divergences are searched on are calculated.
+    t = OHLCTechnicals(df, symbol, interval, required=(OHLCTechnicals.RSI, OHLCTechnicals.MACD))
+    hs = HarmonicSearch(t)
+    hs.search(limit_to=limit_to)
+    hs.forming(limit_to=limit_to, percent_c_to_d=percent_complete)
+    d = DivergenceSearch(t)
+    d.search(limit_to=divergence_limit_to)
+    return {
+        'symbol': symbol,
+        'interval': interval,
+        'formed': hs.get_patterns(),
+        'forming': hs.get_patterns(formed=False),
+        'divergences': d.get_patterns(),
+        'error': None
+    }
+
+_FETCH = 'fetch'
+_SEARCH = 'search'
+_STAGES = {_FETCH: _fetch_candles, _SEARCH: _search_candles}
+
+def _scan_error(symbol, interval, error):
+    return {
+        'symbol': symbol,
+        'interval': interval,
+        'formed': {},
+        'forming': {},
+        'divergences': {},
+        'error': error
+    }
+
+def scan(symbols, intervals, source=None, candles=1000, limit_to=10, percent_complete=0.8,
+         fetch_workers=8, search_workers=None, timeout=None, divergence_limit_to=10):
+    """
+    Search many symbols and intervals for harmonic patterns and divergences without plotting.
+    Candles are fetched concurrently in threads and searched in a pool of processes.
+    A result is yielded for every symbol and interval as soon as its search completes.
+
+    >>> for result in scan(['BTCUSDT', 'ETHUSDT'], [BinanceCandleData.HOUR_1, BinanceCandleData.HOUR_4]):
+    ...     print(result['symbol'], result['interval'], result['formed'], result['error'])
+
+    >>> for result in scan(['AAPL', 'MSFT'], [YahooCandleData.DAY_1], source=YahooCandleData, timeout=60):
+    ...     print(result['forming'])
+
+    :param symbols: The symbols to search.
+    :param intervals: The timeframes or intervals to search each symbol on.
+    :param source: The CandleData class to fetch candles with, BinanceCandleData by default.
+    :param candles: The number of candles to fetch.
+    :param limit_to: Limit the results to patterns that complete in that last n candles, -1 for all of them.
+    :param percent_complete: The percentage of a forming pattern that must be complete.
+    :param fetch_workers: The number of threads fetching candles.
+    :param search_workers: The number of search processes, the number of cpus by default.
+    :param timeout: Seconds allowed for each fetch and for each search once it starts running, None waits forever.
+        Time spent waiting for a free worker does not count.
+    :param divergence_limit_to: The number of pairs of peaks to compare for divergences, None compares them all.
+    :return: A generator of dicts with symbol, interval, formed, forming, divergences and error keys.
+        error is None, or a message when the fetch or search failed or timed out.
+    """
+    if source is None:
+        source = marketdata.BinanceCandleData
+    search_workers = search_workers or os.cpu_count() or 1
+    executors = {
+        _FETCH: ThreadPoolExecutor(max_workers=fetch_workers),
+        _SEARCH: ProcessPoolExecutor(max_workers=search_workers),
+    }
+    workers = {_FETCH: fetch_workers, _SEARCH: search_workers}
+    # Work waiting for a free worker, as (symbol, interval, args).
+    queued = {
+        _FETCH: deque((symbol, interval, (source, symbol, interval, candles)) for symbol in symbols for interval in intervals),
+        _SEARCH: deque(),
+    }
+    busy = {_FETCH: 0, _SEARCH: 0}
+    # future -> (stage, symbol, interval, deadline)
+    pending = {}
+    # future -> stage, work that timed out but cannot be stopped, it keeps its worker until it finishes.
+    abandoned = {}
+
+    def start():
+        # Work is only submitted to a free worker, so it starts running as it is submitted.
+        for stage, work in queued.items():
+            while work and busy[stage] < workers[stage]:
+                symbol, interval, args = work.popleft()
+                future = executors[stage].submit(_STAGES[stage], *args)
+                busy[stage] += 1
+                expires = time.monotonic() + timeout if timeout is not None else None
+                pending[future] = (stage, symbol, interval, expires)
+
+    try:
+        start()
+        # Work is only left queued while abandoned work holds every worker.
+        while pending or any(queued.values()):
+            deadlines = [expires for _, _, _, expires in pending.values() if expires is not None]
+            wait_for = max(0, min(deadlines) - time.monotonic()) if deadlines else None
+            done, _ = wait(list(pending) + list(abandoned), timeout=wait_for, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in abandoned:
+                    busy[abandoned.pop(future)] -= 1
+                    continue
+                stage, symbol, interval, _ = pending.pop(future)
+                busy[stage] -= 1
+                try:
+                    result = future.result()
+                except Exception as e:
+                    yield _scan_error(symbol, interval, f'{type(e).__name__}: {e}')
+                    continue
+                if stage == _SEARCH:
+                    yield result
+                else:
+                    queued[_SEARCH].append(
+                        (symbol, interval, (result, symbol, interval, limit_to, percent_complete, divergence_limit_to))
+                    )
+
+            now = time.monotonic()
+            for future, (stage, symbol, interval, expires) in list(pending.items()):
+                if expires is not None and expires <= now and not future.done():
+                    del pending[future]
+                    if future.cancel():
+                        busy[stage] -= 1
+                    else:
+                        abandoned[future] = stage
+                    yield _scan_error(symbol, interval, f'Timed out after {timeout}s')
+            start()
+    finally:
+        # Do not wait on work that timed out or was abandoned by the caller.  Queued work was never submitted,
+        # anything submitted and not yet running is cancelled here ( shutdown's cancel_futures needs Python 3.9 ).
+        for future in pending:
+            future.cancel()
+        for executor in executors.values():
+            executor.shutdown(wait=False)
@@ -1,7 +1,9 @@
 from .harmonic import HarmonicSearch
 from .divergence import DivergenceSearch
+from .replay import HarmonicReplay
 
 __all__ = (
     'HarmonicSearch',
-    'DivergenceSearch'
+    'DivergenceSearch',
+    'HarmonicReplay'
 )
@@ -1,6 +1,8 @@
 from pyharmonics import constants
 from pyharmonics.patterns import Divergence
 from pyharmonics.technicals import TechnicalsBase
+import numpy as np
+import pandas as pd
 
 class DivergenceSearch:
     """
@@ -11,6 +13,11 @@ class DivergenceSearch:
     EXAGGERATED = 'Exaggerated'
     BULLISH = constants.BULLISH
     BEARISH = constants.BEARISH
+    # The columns of the search_all DataFrame, start and end are candle indexes.
+    COLUMNS = [
+        'indicator', 'bullish', 'name', 'start', 'end', 'price_start', 'price_end',
+        'indicator_start', 'indicator_end', 'reading_start', 'reading_end'
+    ]
 
     def __init__(self, technicals: TechnicalsBase):
         """
@@ -21,154 +28,133 @@ class DivergenceSearch:
         :param TechnicalsBase technicals: The technicals object to search.
         """
         self.t = technicals
-        self.df = technicals.df
         self.found = {self.t.RSI: [], self.t.MACD: []}
 
-    def __exact_dip(self, index, trend, spread):
-        """
-        Find the local minimum the spread around the index.
-
-        >>> d = DivergenceSearch(technicals)
-        >>> d.__exact_dip(100, 'RSI', 20)
-
-        :param int index: The index to search around.
-        :param str trend: The trend to search.
-        :param int spread: The spread to search.
-        :return: The minimum value and index.
-        """
-        idx = list(range(max(index - spread, 0), min(index + spread, len(self.df))))
-        return min(zip(self.df[trend].values[idx], idx))
+    @property
+    def df(self):
+        # Indicators are added to the technicals as they are required, always read its latest df.
+        return self.t.df
 
-    def __exact_peak(self, index, trend, spread):
+    def _exact_extremes(self, indexes, trend, spread, highest):
         """
-        Find the local maximum the spread around the index.
+        Find the local minimum, or maximum, of a trend in the spread around each index.
+        The window around an index runs from index - spread up to, not including, index + spread.
+        A tied minimum resolves to the earliest candle and a tied maximum to the latest.
 
         >>> d = DivergenceSearch(technicals)
-        >>> d.__exact_peak(100, 'RSI', 20)
+        >>> d._exact_extremes(np.array([100, 200]), 'rsi', 20, highest=False)
+        (array([31.2, 28.7]), array([97, 204]))
 
-        :param int index: The index to search around.
+        :param numpy.ndarray indexes: The candle indexes to search around.
         :param str trend: The trend to search.
         :param int spread: The spread to search.
-        :return: The maximum value and index.
-        """
-        idx = list(range(max(index - spread, 0), min(index + spread, len(self.df))))
-        return max(zip(self.df[trend].values[idx], idx))
-
-    def __is_bullish(self, start, end, indicator, price, candle_spread):
-        """
-        Determine if the divergence is bullish.
+        :param bool highest: True for the maximum, False for the minimum.
+        :return: The extreme values and their candle indexes.
+        """
+        values = self.df[trend].values.astype(np.float64)
+        size = len(values)
+        low = np.maximum(indexes - spread, 0)
+        high = np.minimum(indexes + spread, size)
+        cols = low[:, None] + np.arange(2 * spread)
+        fill = -np.inf if highest else np.inf
+        window = values[np.minimum(cols, size - 1)]
+        window[(cols >= high[:, None]) | np.isnan(window)] = fill
+        if highest:
+            x = low + (window.shape[1] - 1 - np.argmax(window[:, ::-1], axis=1))
+        else:
+            x = low + np.argmin(window, axis=1)
+        # A reading that is not yet available at the start of the window is never replaced.
+        x = np.where(np.isnan(values[low]), low, x)
+        return values[x], x
+
+    def _find(self, indicator, peaks, price, bullish, limit_to, candle_spread):
+        """
+        Compare each price peak, or dip, with the one before it working back from the last candle.
+        All pairs are classified at once.
+
+        Bullish, looking at dips:
+            Regular    the indicator makes a higher low as price makes an equal or lower low.
+            Hidden     the indicator makes a lower low as price makes a higher low.
+        Bearish, looking at peaks:
+            Regular    the indicator makes a lower high as price makes an equal or higher high.
+            Hidden     the indicator makes a higher high as price makes a lower high.
 
         >>> d = DivergenceSearch(technicals)
-        >>> d.__is_bullish(100, 200, 'RSI', 'LOW', 20)
+        >>> d._find('rsi', 'price_dips', 'low', True, 3, 20)
 
-        :param int start: The start index.
-        :param int end: The end index.
-        :param str indicator: The indicator to search.
-        :param str price: the price trend to search (LOW or HIGH).
-        :param int candle_spread: The spread to search.
-        """
-        locater = self.df.iloc
-        y1, x1 = self.__exact_dip(start, indicator, candle_spread)
-        y2, x2 = self.__exact_dip(end, indicator, candle_spread)
-        if y1 < y2 and locater[start][price] >= locater[end][price]:
-            # Regular Bullish Divergence
-            self.found[indicator].append(Divergence(
-                indicator,
-                self.REGULAR,
-                self.t.get_index_x([start, end]),
-                (locater[start][price], locater[end][price],),
-                self.t.get_index_x([x1, x2]),
-                [y1, y2],
-                constants.BULLISH
-            ))
-        elif y1 > y2 and locater[start][price] < locater[end][price]:
-            # hidden Bullish Divergence.
-            self.found[indicator].append(Divergence(
-                indicator,
-                self.HIDDEN,
-                self.t.get_index_x([start, end]),
-                (locater[start][price], locater[end][price],),
-                self.t.get_index_x([x1, x2]),
-                [y1, y2],
-                constants.BULLISH
-            ))
-            pass
-
-    def __is_bearish(self, start, end, indicator, price, candle_spread):
-        """
-        Determine if the divergence is bearish.
-
-        >>> d = DivergenceSearch(technicals)
-        >>> d.__is_bearish(100, 200, 'RSI', 'LOW', 20)
-
-        :param int start: The start index.
-        :param int end: The end index.
         :param str indicator: The indicator to search.
+        :param str peaks: The peaks to search.
         :param str price: The price trend to search (open, low, high, close).
-        :param int candle_spread: The spread to search.
-        """
-        locater = self.df.iloc
-        y1, x1 = self.__exact_peak(start, indicator, candle_spread)
-        y2, x2 = self.__exact_peak(end, indicator, candle_spread)
-        if y1 > y2 and locater[start][price] <= locater[end][price]:
-            self.found[indicator].append(Divergence(
-                indicator,
-                self.REGULAR,
-                self.t.get_index_x([start, end]),
-                (locater[start][price], locater[end][price],),
-                self.t.get_index_x([x1, x2]),
-                [y1, y2],
-                constants.BEARISH
-            ))
-        elif y1 < y2 and locater[start][price] > locater[end][price]:
-            # hidden Bullish Divergence.
-            self.found[indicator].append(Divergence(
-                indicator,
-                self.HIDDEN,
-                self.t.get_index_x([start, end]),
-                (locater[start][price], locater[end][price],),
-                self.t.get_index_x([x1, x2]),
-                [y1, y2],
-                constants.BEARISH
-            ))
-
-    def _search(self, indicator, peaks, price, search_func, limit_to, candle_spread):
+        :param bool bullish: True to search dips for bullish divergences, False to search peaks for bearish.
+        :param int limit_to: The number of pairs of peaks to compare, None compares them all.
+        :param int candle_spread: The spread to search for the exact indicator extreme.
+        :return: A dict of arrays, one entry per divergence found ordered from the last candle back.
+        """
+        indexes = np.flatnonzero(self.df[peaks].values)
+        # Most recent first, the first candle is never a peak to compare.
+        indexes = indexes[indexes > 0][::-1]
+        end, start = indexes[:-1], indexes[1:]
+        if limit_to is not None:
+            end, start = end[:max(limit_to, 0)], start[:max(limit_to, 0)]
+
+        y1, x1 = self._exact_extremes(start, indicator, candle_spread, highest=not bullish)
+        y2, x2 = self._exact_extremes(end, indicator, candle_spread, highest=not bullish)
+        prices = self.df[price].values
+        p1, p2 = prices[start], prices[end]
+        if bullish:
+            regular = (y1 < y2) & (p1 >= p2)
+            hidden = ~regular & (y1 > y2) & (p1 < p2)
+        else:
+            regular = (y1 > y2) & (p1 <= p2)
+            hidden = ~regular & (y1 < y2) & (p1 > p2)
+
+        found = regular | hidden
+        return {
+            'start': start[found],
+            'end': end[found],
+            'price_start': p1[found],
+            'price_end': p2[found],
+            'indicator_start': x1[found],
+            'indicator_end': x2[found],
+            'reading_start': y1[found],
+            'reading_end': y2[found],
+            'name': np.where(regular[found], self.REGULAR, self.HIDDEN),
+        }
+
+    def _search(self, indicator, peaks, price, bullish, limit_to, candle_spread):
         """
         Scan for divergences in the slope of a trend.
         Can search for bullish or bearish divergences.
 
         >>> d = DivergenceSearch(technicals)
-        >>> d._search('RSI', 'LOW', 'LOW', d.__is_bullish, 3, 20)
+        >>> d._search('rsi', 'price_dips', 'low', True, 3, 20)
 
         :param str indicator: The indicator to search.
         :param str peaks: The peaks to search.
         :param str price: The price trend to search (open, low, high, close).
-        :param function search_func: The search function to use.
+        :param bool bullish: True to search dips for bullish divergences, False to search peaks for bearish.
         :param int limit_to: The number of divergences to search for.
-        """
-        end = -1
-        start = -1
-        i = len(self.df) - 1
-        count = 0
-        while i > 0 and count < limit_to:
-            if self.df.iloc[i][peaks]:
-                if end < 0:
-                    end = i
-                    i -= 1
-                    continue
-                else:  # Start and end dips located
-                    start = i
-                    span_count = 3
-                    # walk back 3 peaks
-                    while start > 0 and span_count > 0:
-                        search_func(start, end, indicator, price, candle_spread)
-                        while not self.df.iloc[start][peaks]:
-                            start -= 1
-                        span_count -= 1
-                    end = start
-                    start = -1
-                count += 1
-            i -= 1
+        :param int candle_spread: The spread to search for the exact indicator extreme.
+        """
+        found = self._find(indicator, peaks, price, bullish, limit_to, candle_spread)
+        # Look up the candle times for every divergence at once.
+        x1, x2, ind_x1, ind_x2 = (
+            self.t.get_index_x(found[key]) for key in ('start', 'end', 'indicator_start', 'indicator_end')
+        )
+        for i in range(len(x1)):
+            # The same divergence is appended three times on purpose.  The row by row search this replaced
+            # appended it once per pass of an inner loop that never changed it, the copies keep get_patterns
+            # returning what it always has.  search_all reports each pair once.
+            for _ in range(3):
+                self.found[indicator].append(Divergence(
+                    indicator,
+                    str(found['name'][i]),
+                    [x1[i], x2[i]],
+                    (found['price_start'][i], found['price_end'][i],),
+                    [ind_x1[i], ind_x2[i]],
+                    [found['reading_start'][i], found['reading_end'][i]],
+                    constants.BULLISH if bullish else constants.BEARISH
+                ))
 
     def search(self, candle_spread=20, limit_to=3):
         """
@@ -182,10 +168,47 @@ class DivergenceSearch:
         :param int limit_to: The number of divergences to search.
         """
         self.found = {self.t.RSI: [], self.t.MACD: []}
-        self._search(self.t.RSI, self.t.PRICE_DIPS, constants.LOW, self.__is_bullish, limit_to, candle_spread)
-        self._search(self.t.RSI, self.t.PRICE_PEAKS, constants.HIGH, self.__is_bearish, limit_to, candle_spread)
-        self._search(self.t.MACD, self.t.PRICE_DIPS, constants.LOW, self.__is_bullish, limit_to, candle_spread)
-        self._search(self.t.MACD, self.t.PRICE_PEAKS, constants.HIGH, self.__is_bearish, limit_to, candle_spread)
+        self.t.require(self.t.RSI, self.t.MACD)
+        self._search(self.t.RSI, self.t.PRICE_DIPS, constants.LOW, True, limit_to, candle_spread)
+        self._search(self.t.RSI, self.t.PRICE_PEAKS, constants.HIGH, False, limit_to, candle_spread)
+        self._search(self.t.MACD, self.t.PRICE_DIPS, constants.LOW, True, limit_to, candle_spread)
+        self._search(self.t.MACD, self.t.PRICE_PEAKS, constants.HIGH, False, limit_to, candle_spread)
+
+    def search_all(self, indicators=None, candle_spread=20, limit_to=None):
+        """
+        Search every indicator for divergences over the entire history, or the last limit_to pairs of peaks.
+        Each pair of peaks is reported once in a single row of a DataFrame rather than as Divergence objects.
+
+        >>> d = DivergenceSearch(technicals)
+        >>> d.search_all()
+        >>> d.search_all(indicators=[technicals.STOCH_RSI, technicals.BBP], limit_to=50)
+        >>> d.search_all(indicators=['my_indicator'])
+
+        :param list indicators: The columns of technicals.df to search, every indicator of the technicals by default.
+            Any numeric column added to technicals.df can be searched.
+        :param int candle_spread: The spread to search for the exact indicator extreme.
+        :param int limit_to: The number of pairs of peaks to compare for each indicator, None compares them all.
+        :return: pandas.DataFrame with a row per divergence, most recent first for each indicator and direction.
+        """
+        if indicators is None:
+            indicators = list(self.t.indicators)
+        self.t.require(*[indicator for indicator in indicators if indicator in self.t.derived])
+        # Single trend technicals only have closes to compare with.
+        low = constants.LOW if constants.LOW in self.df else constants.CLOSE
+        high = constants.HIGH if constants.HIGH in self.df else constants.CLOSE
+        frames = []
+        for indicator in indicators:
+            for peaks, price, bullish in ((self.t.PRICE_DIPS, low, True), (self.t.PRICE_PEAKS, high, False)):
+                found = self._find(indicator, peaks, price, bullish, limit_to, candle_spread)
+                frame = pd.DataFrame(found)
+                frame.insert(0, 'bullish', bullish)
+                frame.insert(0, 'indicator', indicator)
+                frames.append(frame)
+        divergences = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=self.COLUMNS)
+        divergences = divergences[self.COLUMNS]
+        divergences['start_time'] = self.df.index[divergences['start'].values.astype(np.int64)]
+        divergences['end_time'] = self.df.index[divergences['end'].values.astype(np.int64)]
+        return divergences
 
     def get_patterns(self):
         """
@@ -0,0 +1,137 @@
+__author__ = 'github.com/niall-oc'
+
+from pyharmonics import constants
+from pyharmonics.search.harmonic import HarmonicSearch
+from pyharmonics.technicals import OHLCTechnicals
+import numpy as np
+
+
+class HarmonicReplay:
+    """
+    Replay history candle by candle and report the harmonic patterns that were visible on each candle,
+    using only the candles up to it.  Peaks within peak_spacing of the latest candle are not confirmed,
+    so patterns appear and disappear as they would have done live.
+
+    One OHLCTechnicals and one HarmonicSearch are advanced with update() rather than rebuilt on each candle.
+    Patterns only depend on the price peaks, so a candle that leaves every visible peak as it was changes
+    nothing.  Those candles are found from the latest highs and lows alone, and are appended to the
+    technicals in one batch with the next candle that does change a peak.
+
+    >>> r = HarmonicReplay(b.df, 'BTCUSDT', b.HOUR_1, warmup=500)
+    >>> for step in r.run():
+    ...     for family, patterns in step['formed'].items():
+    ...         for p in patterns:
+    ...             print(step['time'], family, p.name)
+    """
+    def __init__(self, df, symbol, interval, warmup=500, peak_spacing=10, required=(), patterns=None, fib_tolerance=0.03,
+                 check_anchor=True, limit_to=10, percent_c_to_d=0.8):
+        """
+        Constructor for HarmonicReplay
+
+        :param pandas.DataFrame df: The candles to replay, in the OHLCTechnicals format.
+        :param str symbol: The symbol of the candles.
+        :param str interval: The interval of the candles.
+        :param int warmup: The candles the replay starts with.
+        :param int peak_spacing: Passed to OHLCTechnicals.
+        :param list required: Passed to OHLCTechnicals, the price peaks are all a harmonic search needs.
+        :param dict patterns: Passed to HarmonicSearch.
+        :param float fib_tolerance: Passed to HarmonicSearch.
+        :param bool check_anchor: Passed to HarmonicSearch.
+        :param int limit_to: Forming patterns are searched for in this many of the latest peaks, None searches all of them.
+        :param float percent_c_to_d: Passed to HarmonicSearch.forming.
+        """
+        if not 0 < warmup <= len(df):
+            raise ValueError(f'warmup must be between 1 and the {len(df)} candles given')
+        self.df = df
+        self.symbol = symbol
+        self.interval = interval
+        self.warmup = warmup
+        self.peak_spacing = peak_spacing
+        self.required = required
+        self.search_kwargs = dict(patterns=patterns, fib_tolerance=fib_tolerance, check_anchor=check_anchor)
+        self.limit_to = -1 if limit_to is None else limit_to
+        self.percent_c_to_d = percent_c_to_d
+        self.technicals = None
+        self.search = None
+        self._offsets = np.arange(1, peak_spacing + 1)
+        # The price peaks and dips visible on the latest candle replayed.
+        self._tracked = (
+            (df[constants.HIGH].values, np.greater_equal, np.zeros(len(df), dtype=bool)),
+            (df[constants.LOW].values, np.less_equal, np.zeros(len(df), dtype=bool)),
+        )
+
+    def _peaks_changed(self, end):
+        """
+        Update the visible peaks and dips for the candles up to end and report if any changed.
+        Only the last peak_spacing + 2 candles can change when a candle is added, see utils.find_tail_peaks.
+        They are compared with their neighbours at once, the same comparisons utils.find_peaks makes.
+
+        :param int end: The number of candles visible.
+        :return: bool
+        """
+        changed = False
+        start = max(0, end - self.peak_spacing - 2)
+        candles = np.arange(start, end)
+        # The neighbours of each candle as find_peaks sees them, clipped to the candles visible.
+        before = np.maximum(candles[:, None] - self._offsets, 0)
+        after = np.minimum(candles[:, None] + self._offsets, end - 1)
+        for data, comparator, visible in self._tracked:
+            value = data[start:end, None]
+            found = comparator(value, data[before]).all(axis=1) & comparator(value, data[after]).all(axis=1)
+            # Only the last candle of a plateau is a peak, find_peaks compares the last candle with the first.
+            found &= data[start:end] != np.append(data[start + 1:end], data[0])
+            if (found != visible[start:end]).any():
+                visible[start:end] = found
+                changed = True
+        return changed
+
+    def _step(self, index, formed):
+        """
+        The patterns visible on a candle.
+        """
+        self.search.forming(limit_to=self.limit_to, percent_c_to_d=self.percent_c_to_d)
+        return {
+            'index': index,
+            'time': self.df.index[index],
+            'formed': formed,
+            'forming': self.search.get_patterns(formed=False),
+        }
+
+    def run(self):
+        """
+        Replay the candles after the warmup.
+
+        A step is yielded for the last warmup candle and then for every candle that changes a visible peak,
+        nothing visible changes on the candles in between.  The technicals and search hold the state as of
+        the latest step yielded.
+
+        >>> for step in r.run():
+        ...     print(step['index'], step['time'], len(step['formed'][r.search.XABCD]))
+
+        :return: A generator of dicts with keys
+            index    the candle index in df.
+            time     the candle time.
+            formed   the patterns by family that became formed on this candle, every formed pattern on the first step.
+            forming  the patterns by family forming on this candle, within the latest limit_to peaks.
+        """
+        candles = len(self.df)
+        self.technicals = OHLCTechnicals(
+            self.df.iloc[:self.warmup], self.symbol, self.interval, peak_spacing=self.peak_spacing, required=self.required
+        )
+        for (data, comparator, visible), column in zip(self._tracked, (self.technicals.PRICE_PEAKS, self.technicals.PRICE_DIPS)):
+            visible[:] = False
+            visible[:self.warmup] = self.technicals.df[column].values > 0
+        self.search = HarmonicSearch(self.technicals, **self.search_kwargs)
+        self.search.search()
+        yield self._step(self.warmup - 1, {family: list(found) for family, found in self.search.get_patterns().items()})
+
+        appended = self.warmup
+        for end in range(self.warmup + 1, candles + 1):
+            if not self._peaks_changed(end):
+                continue
+            self.technicals.update(self.df.iloc[appended:end])
+            appended = end
+            yield self._step(end - 1, self.search.update())
+        if appended < candles:
+            self.technicals.update(self.df.iloc[appended:])
+            self.search.update()
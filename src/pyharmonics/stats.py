@@ -0,0 +1,105 @@
+__author__ = 'github.com/niall-oc'
+
+import functools
+import time
+
+
+class Stats:
+    """
+    Time and count the phases of a technicals build and a harmonic search.
+
+    Profiling is opt-in.  Pass a Stats to OHLCTechnicals, Technicals or HarmonicSearch and their hot methods
+    are wrapped on that instance only, without one nothing is wrapped and nothing is measured.
+    One Stats can be shared by the technicals and the searches on them, phases are named by their owner.
+
+    >>> stats = Stats()
+    >>> t = OHLCTechnicals(df, 'BTCUSDT', '1h', stats=stats)
+    >>> h = HarmonicSearch(t)  # uses the Stats of the technicals
+    >>> h.search()
+    >>> stats.timings['harmonic.search'], stats.calls['harmonic.anchor'], stats.counters['harmonic.anchor_rejected']
+    (0.0312, 1540, 212)
+
+    Export each top level phase as it completes.
+
+    >>> def export(phase, seconds, stats):
+    ...     histogram.labels(phase).observe(seconds)
+    >>> stats = Stats(callback=export)
+
+    Timings are inclusive, harmonic.search includes the harmonic.anchor checks made during the search.
+    """
+    def __init__(self, callback=None):
+        """
+        Constructor for Stats
+
+        :param callable callback: Called as callback(phase, seconds, stats) each time a top level phase
+            completes, eg. technicals.build, harmonic.fib_matrix or harmonic.search.
+        """
+        self.callback = callback
+        self.reset()
+
+    def reset(self):
+        """
+        Clear every timing, call count, counter and gauge.
+        """
+        self.timings = {}
+        self.calls = {}
+        self.counters = {}
+        self.gauges = {}
+
+    def timed(self, phase, method, report=False):
+        """
+        Wrap a method so each call adds to the time and calls of a phase.
+
+        >>> self._build_fib_matrix = stats.timed('harmonic.fib_matrix', self._build_fib_matrix, report=True)
+
+        :param str phase: The name of the phase.
+        :param callable method: The method to time.
+        :param bool report: True to pass the time of each call to the callback.
+        :return: callable
+        """
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                self.timings[phase] = self.timings.get(phase, 0.0) + elapsed
+                self.calls[phase] = self.calls.get(phase, 0) + 1
+                if report and self.callback is not None:
+                    self.callback(phase, elapsed, self)
+        return wrapper
+
+    def count(self, counter, n=1):
+        """
+        Add to a counter.
+
+        :param str counter: The name of the counter.
+        :param int n: The amount to add.
+        """
+        self.counters[counter] = self.counters.get(counter, 0) + n
+
+    def gauge(self, gauge, value):
+        """
+        Set a gauge, a reading of the current state rather than a running total.
+
+        :param str gauge: The name of the gauge.
+        :param value: The reading.
+        """
+        self.gauges[gauge] = value
+
+    def as_dict(self):
+        """
+        Everything measured, eg. for a log line or a JSON report.
+
+        :return: dict with timings, calls, counters and gauges.
+        """
+        return {
+            'timings': dict(self.timings),
+            'calls': dict(self.calls),
+            'counters': dict(self.counters),
+            'gauges': dict(self.gauges),
+        }
+
+    def __repr__(self):
+        return f'Stats({self.as_dict()})'
@@ -0,0 +1,480 @@
+__author__ = 'github.com/niall-oc'
+
+from ta.trend import MACD as MACDIndicator
+from ta.momentum import RSIIndicator
+from collections import deque
+import pandas as pd
+import numpy as np
+import math
+
+
+def _divide(numerator, denominator):
+    """
+    Divide the way pandas does, 0/0 is nan and x/0 is +/-inf.
+    """
+    if denominator:
+        return numerator / denominator
+    if numerator and not math.isnan(numerator):
+        return math.copysign(math.inf, numerator) * math.copysign(1.0, denominator)
+    return math.nan
+
+
+def _check_fillna(fillna):
+    if fillna:
+        raise ValueError('fillna is not supported by streaming indicators')
+
+
+class EMA:
+    """
+    An exponential moving average updated one reading at a time.
+    Matches ta.trend.EMAIndicator, ie. ewm(span=window, min_periods=window, adjust=False).
+
+    >>> e = EMA(window=21)
+    >>> e.seed(df['close'].values)
+    >>> e.update(21000.0)
+    20666.85
+    """
+    def __init__(self, window=14, alpha=None, fillna=False):
+        """
+        :param int window: The span of the average and the readings needed before it is valid.
+        :param float alpha: The smoothing factor, 2 / (window + 1) by default.
+        :param bool fillna: Not supported, must be False.
+        """
+        _check_fillna(fillna)
+        self.window = window
+        self.alpha = alpha or 2 / (window + 1)
+        self.mean = math.nan
+        self.count = 0
+
+    @property
+    def value(self):
+        return self.mean if self.count >= self.window else math.nan
+
+    def seed(self, values):
+        """
+        Set the state from a history of readings in one pass.
+
+        :param numpy.ndarray values: The readings, nans are skipped.
+        :return: The current value.
+        """
+        values = pd.Series(values, dtype=np.float64).dropna()
+        self.count = len(values)
+        if self.count:
+            self.mean = values.ewm(alpha=self.alpha, adjust=False).mean().iloc[-1]
+        return self.value
+
+    def checkpoint(self):
+        """
+        The state before the next reading, see rollback.
+
+        :return: tuple
+        """
+        return self.mean, self.count
+
+    def rollback(self, state):
+        """
+        Take back the one reading added since checkpoint.
+
+        :param tuple state: From checkpoint.
+        """
+        self.mean, self.count = state
+
+    def update(self, reading):
+        """
+        Add a reading.
+
+        :param float reading: The latest reading, a nan is skipped.
+        :return: The current value.
+        """
+        if not math.isnan(reading):
+            if self.count:
+                self.mean = (1 - self.alpha) * self.mean + self.alpha * reading
+            else:
+                self.mean = reading
+            self.count += 1
+        return self.value
+
+
+class SMA:
+    """
+    A simple moving average updated one reading at a time from a rolling sum.
+    Matches ta.trend.SMAIndicator, ie. rolling(window, min_periods=window).mean().
+
+    >>> s = SMA(window=50)
+    >>> s.seed(df['close'].values)
+    >>> s.update(21000.0)
+    20713.73
+    """
+    def __init__(self, window=14, fillna=False):
+        """
+        :param int window: The number of readings averaged.
+        :param bool fillna: Not supported, must be False.
+        """
+        _check_fillna(fillna)
+        self.window = window
+        self.readings = deque(maxlen=window)
+        self.total = 0.0
+        self.nans = 0
+
+    @property
+    def value(self):
+        if len(self.readings) < self.window or self.nans:
+            return math.nan
+        return self.total / self.window
+
+    def seed(self, values):
+        """
+        Set the state from a history of readings, only the last window readings matter.
+
+        :param numpy.ndarray values: The readings.
+        :return: The current value.
+        """
+        self.readings = deque((float(v) for v in values[-self.window:]), maxlen=self.window)
+        self.nans = sum(1 for v in self.readings if math.isnan(v))
+        self.total = math.fsum(v for v in self.readings if not math.isnan(v))
+        return self.value
+
+    def checkpoint(self):
+        """
+        The state before the next reading, only the reading it would drop from the window is kept.
+
+        :return: tuple
+        """
+        full = len(self.readings) == self.window
+        return self.total, self.nans, self.readings[0] if full else None, full
+
+    def rollback(self, state):
+        """
+        Take back the one reading added since checkpoint.
+
+        :param tuple state: From checkpoint.
+        """
+        self.total, self.nans, oldest, full = state
+        self.readings.pop()
+        if full:
+            self.readings.appendleft(oldest)
+
+    def update(self, reading):
+        """
+        Add a reading, dropping the oldest once the window is full.
+
+        :param float reading: The latest reading.
+        :return: The current value.
+        """
+        if len(self.readings) == self.window:
+            oldest = self.readings[0]
+            if math.isnan(oldest):
+                self.nans -= 1
+            else:
+                self.total -= oldest
+        self.readings.append(reading)
+        if math.isnan(reading):
+            self.nans += 1
+        else:
+            self.total += reading
+        return self.value
+
+
+class RSI:
+    """
+    The relative strength index with Wilder smoothing updated one close at a time.
+    Matches ta.momentum.RSIIndicator.
+
+    >>> r = RSI(window=14)
+    >>> r.seed(df['close'].values)
+    >>> r.update(21000.0)
+    67.2
+    """
+    def __init__(self, window=14, fillna=False):
+        """
+        :param int window: The smoothing window.
+        :param bool fillna: Not supported, must be False.
+        """
+        _check_fillna(fillna)
+        self.window = window
+        self.up = EMA(window, alpha=1 / window)
+        self.down = EMA(window, alpha=1 / window)
+        self.close = math.nan
+
+    @property
+    def value(self):
+        up, down = self.up.value, self.down.value
+        if down == 0:
+            return 100.0
+        return 100 - (100 / (1 + _divide(up, down)))
+
+    def seed(self, values):
+        """
+        Set the state from a history of closes in one pass.
+
+        :param numpy.ndarray values: The closes.
+        :return: The current value.
+        """
+        diff = pd.Series(values, dtype=np.float64).diff(1)
+        self.up.seed(diff.where(diff > 0, 0.0).values)
+        self.down.seed(-diff.where(diff < 0, 0.0).values)
+        if len(values):
+            self.close = float(values[-1])
+        return self.value
+
+    def checkpoint(self):
+        """
+        The state before the next close, see rollback.
+        """
+        return self.up.checkpoint(), self.down.checkpoint(), self.close
+
+    def rollback(self, state):
+        """
+        Take back the one close added since checkpoint.
+        """
+        up, down, self.close = state
+        self.up.rollback(up)
+        self.down.rollback(down)
+
+    def update(self, close):
+        """
+        Add a close.
+
+        :param float close: The latest close.
+        :return: The current value.
+        """
+        diff = close - self.close
+        self.up.update(diff if diff > 0 else 0.0)
+        self.down.update(-diff if diff < 0 else 0.0)
+        self.close = close
+        return self.value
+
+
+class MACD:
+    """
+    The MACD histogram ( macd - signal ) updated one close at a time.
+    Matches ta.trend.MACD.macd_diff.
+
+    >>> m = MACD(window_slow=26, window_fast=12, window_sign=9)
+    >>> m.seed(df['close'].values)
+    >>> m.update(21000.0)
+    43.45
+    """
+    def __init__(self, window_slow=26, window_fast=12, window_sign=9, fillna=False):
+        """
+        :param int window_slow: The slow EMA window.
+        :param int window_fast: The fast EMA window.
+        :param int window_sign: The signal EMA window.
+        :param bool fillna: Not supported, must be False.
+        """
+        _check_fillna(fillna)
+        self.slow = EMA(window_slow)
+        self.fast = EMA(window_fast)
+        self.signal = EMA(window_sign)
+        self.macd = math.nan
+
+    @property
+    def value(self):
+        return self.macd - self.signal.value
+
+    def seed(self, values):
+        """
+        Set the state from a history of closes in one pass.
+
+        :param numpy.ndarray values: The closes.
+        :return: The current value.
+        """
+        close = pd.Series(values, dtype=np.float64)
+        macd = MACDIndicator(close=close, window_slow=self.slow.window, window_fast=self.fast.window).macd()
+        self.fast.seed(values)
+        self.slow.seed(values)
+        self.signal.seed(macd.values)
+        self.macd = self.fast.value - self.slow.value
+        return self.value
+
+    def checkpoint(self):
+        """
+        The state before the next close, see rollback.
+        """
+        return self.slow.checkpoint(), self.fast.checkpoint(), self.signal.checkpoint(), self.macd
+
+    def rollback(self, state):
+        """
+        Take back the one close added since checkpoint.
+        """
+        slow, fast, signal, self.macd = state
+        self.slow.rollback(slow)
+        self.fast.rollback(fast)
+        self.signal.rollback(signal)
+
+    def update(self, close):
+        """
+        Add a close.
+
+        :param float close: The latest close.
+        :return: The current value.
+        """
+        self.macd = self.fast.update(close) - self.slow.update(close)
+        self.signal.update(self.macd)
+        return self.value
+
+
+class StochRSI:
+    """
+    The stochastic RSI %d updated one close at a time.
+    Matches ta.momentum.StochRSIIndicator.stochrsi_d.
+
+    >>> s = StochRSI(window=14)
+    >>> s.seed(df['close'].values)
+    >>> s.update(21000.0)
+    0.92
+    """
+    def __init__(self, window=14, smooth1=3, smooth2=3, fillna=False):
+        """
+        :param int window: The RSI window and the window of RSI highs and lows.
+        :param int smooth1: The %k smoothing window.
+        :param int smooth2: The %d smoothing window.
+        :param bool fillna: Not supported, must be False.
+        """
+        _check_fillna(fillna)
+        self.window = window
+        self.rsi = RSI(window)
+        self.rsis = deque(maxlen=window)
+        self.k = SMA(smooth1)
+        self.d = SMA(smooth2)
+
+    @property
+    def value(self):
+        return self.d.value
+
+    def _stoch(self):
+        if len(self.rsis) < self.window or any(math.isnan(r) for r in self.rsis):
+            return math.nan
+        lowest = min(self.rsis)
+        return _divide(self.rsis[-1] - lowest, max(self.rsis) - lowest)
+
+    def seed(self, values):
+        """
+        Set the state from a history of closes in one pass.
+
+        :param numpy.ndarray values: The closes.
+        :return: The current value.
+        """
+        rsi = RSIIndicator(close=pd.Series(values, dtype=np.float64), window=self.window).rsi()
+        lowest = rsi.rolling(self.window).min()
+        stoch = (rsi - lowest) / (rsi.rolling(self.window).max() - lowest)
+        k = stoch.rolling(self.k.window).mean()
+
+        self.rsi.seed(values)
+        self.rsis = deque(rsi.values[-self.window:].tolist(), maxlen=self.window)
+        self.k.seed(stoch.values)
+        self.d.seed(k.values)
+        return self.value
+
+    def checkpoint(self):
+        """
+        The state before the next close, see rollback.
+        """
+        full = len(self.rsis) == self.window
+        return self.rsi.checkpoint(), self.rsis[0] if full else None, full, self.k.checkpoint(), self.d.checkpoint()
+
+    def rollback(self, state):
+        """
+        Take back the one close added since checkpoint.
+        """
+        rsi, oldest, full, k, d = state
+        self.rsi.rollback(rsi)
+        self.rsis.pop()
+        if full:
+            self.rsis.appendleft(oldest)
+        self.k.rollback(k)
+        self.d.rollback(d)
+
+    def update(self, close):
+        """
+        Add a close.
+
+        :param float close: The latest close.
+        :return: The current value.
+        """
+        self.rsis.append(self.rsi.update(close))
+        return self.d.update(self.k.update(self._stoch()))
+
+
+class BollingerPercent:
+    """
+    The Bollinger band percentage ( %B ) updated one close at a time.
+    Matches ta.volatility.BollingerBands.bollinger_pband.
+    The mean and standard deviation come from rolling sums of the closes and their squares.
+
+    >>> b = BollingerPercent(window=20, window_dev=2)
+    >>> b.seed(df['close'].values)
+    >>> b.update(21000.0)
+    1.28
+    """
+    def __init__(self, window=20, window_dev=2, fillna=False):
+        """
+        :param int window: The number of closes in the band.
+        :param float window_dev: The number of standard deviations from the mean to each band.
+        :param bool fillna: Not supported, must be False.
+        """
+        _check_fillna(fillna)
+        self.window_dev = window_dev
+        self.mean = SMA(window)
+        self.squares = 0.0
+        self.added = 0
+
+    @property
+    def value(self):
+        mean = self.mean.value
+        if math.isnan(mean):
+            return math.nan
+        variance = self.squares / self.mean.window - mean * mean
+        # Rounding leaves a flat window a tiny or negative variance rather than none.
+        if variance <= 1e-12 * mean * mean:
+            return math.nan
+        std = math.sqrt(variance)
+        low = mean - self.window_dev * std
+        return (self.mean.readings[-1] - low) / (2 * self.window_dev * std)
+
+    def seed(self, values):
+        """
+        Set the state from a history of closes, only the last window closes matter.
+
+        :param numpy.ndarray values: The closes.
+        :return: The current value.
+        """
+        self.mean.seed(values)
+        self._sum_squares()
+        return self.value
+
+    def _sum_squares(self):
+        self.squares = math.fsum(v * v for v in self.mean.readings if not math.isnan(v))
+        self.added = 0
+
+    def checkpoint(self):
+        """
+        The state before the next close, see rollback.
+        """
+        return self.mean.checkpoint(), self.squares, self.added
+
+    def rollback(self, state):
+        """
+        Take back the one close added since checkpoint.
+        """
+        mean, self.squares, self.added = state
+        self.mean.rollback(mean)
+
+    def update(self, close):
+        """
+        Add a close.
+
+        :param float close: The latest close.
+        :return: The current value.
+        """
+        readings = self.mean.readings
+        if len(readings) == self.mean.window and not math.isnan(readings[0]):
+            self.squares -= readings[0] * readings[0]
+        if not math.isnan(close):
+            self.squares += close * close
+        self.mean.update(close)
+        self.added += 1
+        if self.added == self.mean.window:
+            # Sum again once per window, so rounding does not build up in the running sum.
+            self._sum_squares()
+        return self.value
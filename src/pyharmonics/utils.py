@@ -151,6 +151,40 @@ def get_pattern_definition(tolerance: float, patterns: dict) -> dict:
     return harmonic_patterns
 
 
+def get_retrace_intervals(patterns: dict) -> dict:
+    """
+    Precompile the [min, max] retrace range of every pattern in each stage into sorted boundaries.
+    Every boundary and every gap between two boundaries has a precomputed answer, so a retrace maps
+    to the patterns it fits with a single bisect.
+
+    >>> bounds, points, gaps = utils.get_retrace_intervals({'ABC': {'a': {'min': 0.5, 'max': 0.7}}})['ABC']
+    >>> bounds, points, gaps
+    ([0.5, 0.7], [frozenset({'a'}), frozenset({'a'})], [frozenset(), frozenset({'a'}), frozenset()])
+
+    :param patterns: The pattern definitions, as returned by get_pattern_definition.
+    :return: For each stage the sorted boundaries, the patterns matching on each boundary
+        and the patterns matching in each gap, gaps[i] lies just below bounds[i].
+    """
+    intervals = {}
+    for stage, stage_patterns in patterns.items():
+        bounds = sorted({
+            limit
+            for details in stage_patterns.values()
+            for limit in (details[constants.MIN], details[constants.MAX])
+        })
+        points = [
+            frozenset(p for p, d in stage_patterns.items() if d[constants.MIN] <= bound <= d[constants.MAX])
+            for bound in bounds
+        ]
+        # A gap is open at both ends so it matches a pattern when the whole gap lies within its range.
+        gaps = [
+            frozenset(p for p, d in stage_patterns.items() if d[constants.MIN] <= low and high <= d[constants.MAX])
+            for low, high in zip([float('-inf')] + bounds, bounds + [float('inf')])
+        ]
+        intervals[stage] = (bounds, points, gaps)
+    return intervals
+
+
 def get_candle_span(candle_time, candle_gap: int, num_gaps: int) -> list:
     """
     Get the span of candles around the given candle time.
@@ -256,11 +290,104 @@ def find_peaks(data, comparator, axis=0, order=1, mode='clip'):
         results &= comparator(main, minus)
         if ~results.any():
             break
-    # Calculate plateaus
-    plateaus = (data == np.roll(data, 1))
-    for i in range(len(plateaus)):
-        # Just passed a plateau
-        if plateaus[i]:
-            # Remove the first registered peak in a plateau leaving the latter only as a peak
-            results[i - 1] = False
+    # Calculate plateaus, data[i] == data[i - 1] wrapping around at i = 0.
+    plateaus = (data == np.roll(data, 1, axis=axis))
+    # Remove the earlier registered peaks in a plateau leaving the last one only as a peak.
+    results &= ~np.roll(plateaus, -1, axis=axis)
+    return results
+
+
+def find_peaks_batch(data, comparators, order=1, mode='clip'):
+    """
+    Calculate the relative extrema of several series of equal length in one pass.
+    Row n of the result is identical to find_peaks(data[n], comparators[n], order=order, mode=mode).
+
+    >>> import numpy as np
+    >>> testdata = np.array([[1,2,3,2,1], [3,2,1,2,3]])
+    >>> utils.find_peaks_batch(testdata, (np.greater, np.less))
+    array([[False, False,  True, False, False],
+           [False, False,  True, False, False]])
+
+    :param data: A 2-D array with one series per row.
+    :param comparators: One comparison function per row, or a single one for every row.
+    :param order: The order of the peak.
+    :param mode: The mode to use.
+    :return: The relative extrema, a 2-D array of bool shaped like data.
+    """
+    if (int(order) != order) or (order < 1):
+        raise ValueError('Order must be an int >= 1')
+    data = np.asarray(data)
+    if data.ndim != 2:
+        raise ValueError('data must be a 2-D array with one series per row')
+    if callable(comparators):
+        comparators = [comparators] * len(data)
+    if len(comparators) != len(data):
+        raise ValueError('One comparator is needed per row of data')
+
+    # Rows sharing a comparator are compared together.
+    groups = {}
+    for row, comparator in enumerate(comparators):
+        groups.setdefault(comparator, []).append(row)
+    groups = [(comparator, np.array(rows)) for comparator, rows in groups.items()]
+
+    locs = np.arange(0, data.shape[1])
+    results = np.ones(data.shape, dtype=bool)
+    for shift in range(1, order + 1):
+        plus = data.take(locs + shift, axis=1, mode=mode)
+        minus = data.take(locs - shift, axis=1, mode=mode)
+        for comparator, rows in groups:
+            results[rows] &= comparator(data[rows], plus[rows]) & comparator(data[rows], minus[rows])
+        if ~results.any():
+            break
+    plateaus = (data == np.roll(data, 1, axis=1))
+    results &= ~np.roll(plateaus, -1, axis=1)
     return results
+
+
+def find_tail_peaks(data, comparator, start, order=1):
+    """
+    The results of find_peaks for data[start:], looking only at the values around them.
+    When values are appended to data only the results from its old length - order - 1 onwards can change.
+
+    >>> import numpy as np
+    >>> utils.find_tail_peaks(np.array([1, 2, 3, 2, 1, 4, 1]), np.greater_equal, 3, order=1)
+    array([False, False,  True, False])
+
+    :param data: The data to search for peaks.
+    :param comparator: The comparison function.
+    :param start: The first index to find the results of.
+    :param order: The order of the peak.
+    :return: The relative extrema from start, identical to find_peaks(data, comparator, order=order)[start:].
+    """
+    low = max(0, start - order)
+    # find_peaks compares the first and last value when clearing plateaus.
+    # Keeping data[0] at the front of the window preserves that comparison.
+    window = np.concatenate((data[:1], data[low:]))
+    return find_peaks(window, comparator, order=order)[start - low + 1:]
+
+
+def find_tail_peaks_batch(data, comparators, start, order=1):
+    """
+    find_tail_peaks for several series of equal length in one pass, see find_peaks_batch.
+
+    >>> import numpy as np
+    >>> utils.find_tail_peaks_batch([np.array([1, 2, 3, 2, 1, 4, 1])] * 2, (np.greater_equal, np.less_equal), 3)
+    array([[False, False,  True, False],
+           [False,  True, False, False]])
+
+    :param data: A sequence of series of equal length.
+    :param comparators: One comparison function per series, or a single one for every series.
+    :param start: The first index to find the results of.
+    :param order: The order of the peak.
+    :return: A 2-D array of bool, row n is identical to find_tail_peaks(data[n], comparators[n], start, order=order).
+    """
+    low = max(0, start - order)
+    window = np.vstack([np.concatenate((series[:1], series[low:])) for series in data])
+    if callable(comparators):
+        comparators = [comparators] * len(window)
+    # The windows are short, one find_peaks call per comparator is quicker than indexing rows per shift.
+    results = np.empty(window.shape, dtype=bool)
+    for comparator in set(comparators):
+        rows = [row for row, other in enumerate(comparators) if other is comparator]
+        results[rows] = find_peaks(window[rows], comparator, axis=1, order=order)
+    return results[:, start - low + 1:]
@@ -0,0 +1,56 @@
+__author__ = 'github.com/niall-oc'
+
+from pyharmonics import constants
+from pyharmonics.backtest import Backtest, _range_max_table, _first_touch
+from pyharmonics.search import HarmonicSearch
+from pyharmonics.technicals import OHLCTechnicals
+import numpy as np
+import pandas as pd
+
+df = pd.read_pickle("tests/data/btc_test_data")
+t = OHLCTechnicals(df, 'BTCUSDT', '1h', peak_spacing=10)
+h = HarmonicSearch(t)
+h.search()
+
+
+def walk(pos, start, end):
+    """
+    Walk a position forward one candle at a time, the stop is checked first on each candle.
+    """
+    high, low = df[constants.HIGH].values, df[constants.LOW].values
+    hits = 0
+    for i in range(start, end):
+        if (low[i] <= pos.stop) if pos.long else (high[i] >= pos.stop):
+            return [constants.STOPPED, constants.TARGET1, constants.TARGET2, constants.TARGET3][hits], constants.CLOSED
+        while hits < 3 and ((high[i] >= pos.targets[hits]) if pos.long else (low[i] <= pos.targets[hits])):
+            hits += 1
+        if hits == 3:
+            return constants.TARGET3, constants.CLOSED
+    return [constants.WAITING, constants.TARGET1, constants.TARGET2][hits], constants.OPENED
+
+
+def test_first_touch():
+    rng = np.random.default_rng(3)
+    values = rng.normal(size=300)
+    starts = rng.integers(0, 310, 500)
+    levels = rng.normal(size=500) * 2
+    expected = [next((i for i in range(s, len(values)) if values[i] >= level), -1) for s, level in zip(starts, levels)]
+    assert (_first_touch(_range_max_table(values), starts, levels) == expected).all()
+
+
+def test_backtest():
+    for entry_delay, max_hold in ((0, None), (10, 30)):
+        bt = Backtest(t, h.get_patterns(), entry_delay=entry_delay, max_hold=max_hold)
+        results = bt.run()
+        assert (len(results) == len(bt.positions) == sum(len(p) for p in h.get_patterns().values()))
+        for (_, row), pos in zip(results.iterrows(), bt.positions):
+            start = row['entry'] + 1 + entry_delay
+            end = len(df) if max_hold is None else min(len(df), start + max_hold)
+            assert ((pos.target_hit, pos.status) == walk(pos, start, end))
+            assert ((row['target_hit'], row['status']) == (pos.target_hit, pos.status))
+            assert (np.isnan(row['return']) == (pos.status == constants.OPENED))
+
+    summary = bt.summary()
+    assert (summary['positions'].sum() == len(results))
+    assert (summary['closed'].sum() == (results['status'] == constants.CLOSED).sum())
+    assert ((summary['t1'] >= summary['t2']).all() and (summary['t2'] >= summary['t3']).all())
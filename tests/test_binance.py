@@ -1,6 +1,11 @@
-from pyharmonics.marketdata import BinanceCandleData
+from pyharmonics.marketdata import BinanceCandleData, AsyncBinanceCandleData
+from binance.error import ClientError
 import pandas as pd
+import asyncio
 import datetime
+import threading
+import pytest
+import time
 
 b = BinanceCandleData()
 
@@ -52,3 +57,116 @@ def test_get_candles_start_end():
     b.get_candles('BTCUSDT', b.HOUR_1, start=datetime.datetime(2022, 12, 10), end=datetime.datetime(2023, 2, 10))
     assert (len(b.df) == 1498)
     assert (b.df.iloc[0][b.CLOSE_TIME] < b.df.iloc[-1][b.CLOSE_TIME])
+
+
+class FakeSpot:
+    """
+    Serves klines the way Binance does from a clock frozen at NOW, with a delay per request.
+    The first `fail` requests are answered with a 429.
+    """
+    NOW = 1699999200000
+    INTERVALS = {'1m': 60000, '1h': 3600000}
+
+    def __init__(self, delay=0.0, fail=0):
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+        self.active = 0
+        self.most_active = 0
+        self.lock = threading.Lock()
+
+    def klines(self, symbol, interval, startTime=None, endTime=None, limit=None):
+        with self.lock:
+            self.calls += 1
+            if self.fail:
+                self.fail -= 1
+                raise ClientError(429, -1003, 'Too many requests', {'Retry-After': '0'})
+            self.active += 1
+            self.most_active = max(self.most_active, self.active)
+        time.sleep(self.delay)
+        step = self.INTERVALS[interval]
+        limit = limit or 500
+        last = (min(endTime or self.NOW, self.NOW) // step) * step
+        if startTime is not None:
+            opens = range(-(-startTime // step) * step, last + 1, step)[:limit]
+        else:
+            opens = range(last - (limit - 1) * step, last + 1, step)
+        with self.lock:
+            self.active -= 1
+        return [
+            [o, o / 1e6, o / 1e6 + 1, o / 1e6 - 1, o / 1e6 + 0.5, 10.0, o + step - 1, 0.0, 1, 0.0, 0.0, 0.0]
+            for o in opens
+        ]
+
+
+def test_to_dataframe():
+    fb = BinanceCandleData()
+    fb._set_params('BTCUSDT', fb.HOUR_1)
+    rows = FakeSpot().klines('BTCUSDT', fb.HOUR_1, limit=10)
+    rows = [[str(v) if isinstance(v, float) else v for v in row] for row in rows]
+    df = fb._to_dataframe(rows)
+    assert (list(df.columns) == fb.COLUMNS)
+    assert (df[fb.CLOSE].dtype == float and df[fb.CLOSE_TIME].dtype == 'int64')
+    assert (df.index.name == fb.INDEX and (df.index == df[fb.DTS]).all())
+    assert (df[fb.CLOSE_TIME].iloc[-1] == (FakeSpot.NOW + 3600000 - 1) // 1000)
+
+    # Blocks arriving newest first and overlapping on a candle come out sorted and unique.
+    shuffled = fb._to_dataframe(rows[5:] + rows[:6])
+    pd.testing.assert_frame_equal(shuffled, df)
+
+
+def test_concurrent_blocks():
+    fb = BinanceCandleData(workers=8)
+    fb.rc = FakeSpot(delay=0.02)
+    fb.get_candles('BTCUSDT', fb.MIN_1, num_candles=25500, end=FakeSpot.NOW)
+    assert (len(fb.df) == 25500)
+    assert (fb.rc.calls == 26)
+    assert (fb.rc.most_active > 1)
+    assert ((fb.df[fb.CLOSE_TIME].diff().dropna() == 60).all())
+    assert (fb.df[fb.CLOSE_TIME].iloc[-1] == (FakeSpot.NOW + 60000 - 1) // 1000)
+
+    # Each block covers its own span of the range.
+    start, end = FakeSpot.NOW - 3000 * 3600000, FakeSpot.NOW - 500 * 3600000
+    fb.get_candles('BTCUSDT', fb.HOUR_1, start=start, end=end)
+    assert (len(fb.df) == 2501)
+    assert (fb.rc.calls == 26 + 3)
+
+    # Sequential fetches hand back the same candles, less one for each block boundary they overlap on.
+    sb = BinanceCandleData()
+    sb.rc = FakeSpot()
+    sb.get_candles('BTCUSDT', sb.MIN_1, num_candles=5000, end=FakeSpot.NOW)
+    fb.get_candles('BTCUSDT', fb.MIN_1, num_candles=5000, end=FakeSpot.NOW)
+    pd.testing.assert_frame_equal(fb.df[-len(sb.df):], sb.df)
+    assert (len(fb.df) == 5000)
+
+
+def test_block_back_off():
+    fb = BinanceCandleData(workers=4, retries=2)
+    fb.rc = FakeSpot(fail=2)
+    fb.get_candles('BTCUSDT', fb.HOUR_1, num_candles=100, end=FakeSpot.NOW)
+    assert (len(fb.df) == 100)
+    assert (fb.rc.calls == 3)
+
+    fb.rc = FakeSpot(fail=3)
+    with pytest.raises(ClientError):
+        fb.get_candles('BTCUSDT', fb.HOUR_1, num_candles=100, end=FakeSpot.NOW)
+
+
+def test_async_get_candles_many():
+    ab = AsyncBinanceCandleData(client=FakeSpot(delay=0.05))
+    symbols = [f'SYM{i}USDT' for i in range(24)]
+    started = time.perf_counter()
+    dfs = asyncio.run(ab.get_candles_many([(symbol, ab.HOUR_1) for symbol in symbols], num_candles=100, end=FakeSpot.NOW))
+    elapsed = time.perf_counter() - started
+    assert (len(dfs) == len(symbols))
+    assert (all(len(df) == 100 for df in dfs))
+    assert (1 < ab.client.most_active <= ab.max_in_flight)
+    assert (elapsed < 0.05 * len(symbols))
+    # Each request in flight takes its own BinanceCandleData, they are kept for the next batch.
+    assert (1 < len(ab._idle) <= ab.max_in_flight)
+
+    ab.client.fail = 4
+    ab.kwargs['retries'] = 0
+    ab._idle = []
+    dfs = asyncio.run(ab.get_candles_many([(symbol, ab.HOUR_1) for symbol in symbols[:8]], return_exceptions=True))
+    assert (sum(isinstance(df, ClientError) for df in dfs) == 4)
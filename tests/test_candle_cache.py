@@ -0,0 +1,63 @@
+__author__ = 'github.com/niall-oc'
+
+from pyharmonics.marketdata import BinanceCandleData, CandleCache
+import pandas as pd
+import time
+
+
+class ClockCandleData(BinanceCandleData):
+    """
+    Serves the test candles as if the last one closes this hour, counting the candles it hands out.
+    """
+    history = None
+    served = 0
+
+    @classmethod
+    def set_history(cls):
+        candles = pd.read_pickle('tests/data/btc_test_data')
+        df = pd.DataFrame({column: candles[column].values for column in BinanceCandleData.COLUMNS})
+        last_close = (int(time.time()) // 3600 + 1) * 3600 - 1
+        df['close_time'] = last_close - 3600 * (len(df) - 1 - df.index.values)
+        df['dts'] = pd.to_datetime(df['close_time'], unit='s', utc=True).dt.tz_convert('Europe/Dublin')
+        cls.history = df
+
+    def _get_candles(self, symbol, interval, num_candles=None, start=None, end=None):
+        self._set_params(symbol, interval, num_candles=num_candles, start=start, end=end)
+        self.df = self.history[-self.num_candles:].copy()
+        ClockCandleData.served += len(self.df)
+        self.reset_index()
+
+
+def test_candle_cache(tmp_path):
+    ClockCandleData.set_history()
+    cache = CandleCache(tmp_path)
+    direct = ClockCandleData()
+    direct.get_candles('BTCUSDT', direct.HOUR_1, num_candles=500)
+
+    c = ClockCandleData(cache=cache)
+    c.get_candles('BTCUSDT', c.HOUR_1, num_candles=500)
+    assert (cache.stats == {'hits': 0, 'misses': 1, 'fetched': 500})
+    pd.testing.assert_frame_equal(c.df, direct.df)
+
+    # The last candle was still forming and has changed since.
+    history = ClockCandleData.history
+    history.loc[len(history) - 1, 'close'] += 100
+    ClockCandleData.served = 0
+    c = ClockCandleData(cache=cache)
+    c.get_candles('BTCUSDT', c.HOUR_1, num_candles=500)
+    assert (cache.hits == 1)
+    assert (ClockCandleData.served < 5)
+    direct.get_candles('BTCUSDT', direct.HOUR_1, num_candles=500)
+    pd.testing.assert_frame_equal(c.df, direct.df)
+    assert (c.num_candles == 500)
+
+    # Asking for fewer is a hit, asking for more than is cached is a miss.
+    c.get_candles('BTCUSDT', c.HOUR_1, num_candles=100)
+    assert (len(c.df) == 100 and cache.hits == 2)
+    c.get_candles('BTCUSDT', c.HOUR_1, num_candles=800)
+    assert (len(c.df) == 800 and cache.misses == 2)
+    assert (len(cache.load(c.SOURCE, 'BTCUSDT', c.HOUR_1, c.time_zone)) == 800)
+
+    assert (cache.path(c.SOURCE, 'BTCUSDT', c.MONTH_1) != cache.path(c.SOURCE, 'BTCUSDT', c.MIN_1))
+    cache.clear()
+    assert (cache.load(c.SOURCE, 'BTCUSDT', c.HOUR_1, c.time_zone) is None)
@@ -3,6 +3,7 @@ from pyharmonics.marketdata import BinanceCandleData
 from pyharmonics.search import DivergenceSearch
 from pyharmonics.technicals import OHLCTechnicals
 import pandas as pd
+import numpy as np
 
 b = BinanceCandleData()
 b._set_params('BTCUSDT', b.HOUR_1, 1000, None, None)
@@ -17,3 +18,28 @@ def test_divergence_search():
     print(len(found[t.MACD]))
     assert len(found[t.RSI]) == 48
     assert len(found[t.MACD]) == 48
+
+
+def test_exact_extremes():
+    d = DivergenceSearch(t)
+    values = t.df[t.RSI].values
+    indexes = np.flatnonzero(t.df[t.PRICE_DIPS].values)
+    for highest in (False, True):
+        y, x = d._exact_extremes(indexes, t.RSI, 20, highest)
+        for index, value, at in zip(indexes, y, x):
+            window = range(max(index - 20, 0), min(index + 20, len(values)))
+            expected = max(zip(values[window], window)) if highest else min(zip(values[window], window))
+            assert ((value, at) == expected or (np.isnan(value) and at == expected[1]))
+
+
+def test_search_all():
+    d = DivergenceSearch(t)
+    found = d.search_all()
+    assert (list(found.columns) == DivergenceSearch.COLUMNS + ['start_time', 'end_time'])
+    assert (set(found['indicator']) == {t.RSI, t.MACD, t.STOCH_RSI, t.BBP})
+    # search reports each divergence three times.
+    d.search(limit_to=10000)
+    rsi = found[found['indicator'] == t.RSI]
+    assert (len(rsi) * 3 == len(d.get_patterns()[t.RSI]))
+    assert (list(rsi['start_time']) == [p.x[0] for p in d.get_patterns()[t.RSI][::3]])
+    assert (len(d.search_all(indicators=[t.RSI], limit_to=3)) <= 6)
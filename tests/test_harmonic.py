@@ -2,7 +2,10 @@ from pyharmonics import constants
 from pyharmonics.marketdata import BinanceCandleData
 from pyharmonics.search import HarmonicSearch
 from pyharmonics.technicals import OHLCTechnicals
+from pyharmonics.stats import Stats
 import pandas as pd
+import numpy as np
+import pickle
 
 b = BinanceCandleData()
 b._set_params('BTCUSDT', b.HOUR_1, 1000, None, None)
@@ -208,6 +211,10 @@ def test_xabcd_forming():
         'ee85f86ec85de95f4c153a3af0ea9f20d64ba72f1207b2454ff460133eddde08'
     ])
     assert (expected == results)
+    # An A to C leg without a retrace reads False, never a sentinel of the matrix.
+    abc = [p.retraces[constants.ABC] for p in h._forming[constants.XABCD]]
+    assert (sum(r is False for r in abc) == 2)
+    assert all(r is False or r >= constants.R_382 for r in abc)
 
 
 def test_xabcd_forming_anchor():
@@ -259,3 +266,135 @@ def test_abcd_forming_anchor():
         'e04d2c33acdff56a9807c07f44d34bece09bc3fbd8f41bfef0b97844e5a9d8f8'
     ])
     assert (expected == results)
+
+
+def test_fib_matrix():
+    assert (h.fib_matrix.shape == (len(t.peak_data), len(t.peak_data)))
+    assert (h.fib_matrix.dtype == np.float64)
+    lower = np.tril(np.ones(h.fib_matrix.shape, dtype=bool))
+    assert ((h.fib_matrix[lower] == h.UNREACHABLE).all())
+    upper = h.fib_matrix[~lower]
+    assert (((upper == h.PEAK) | (upper == h.NO_RETRACE) | (upper >= constants.R_382)).all())
+
+
+def test_retrace_index():
+    for candle_idx in range(h.MATRIX_LEN):
+        rows, peak_idxs, retraces, _ = h._get_candle_retraces(candle_idx)
+        column = h.fib_matrix[:, candle_idx]
+        assert (rows == np.flatnonzero(column >= constants.R_382).tolist())
+        assert (retraces == column[rows].tolist())
+        for idx, peak_idx in zip(rows, peak_idxs):
+            assert (idx <= peak_idx < candle_idx)
+            assert (peak_idx == idx or h.fib_matrix[idx, peak_idx] == h.PEAK)
+            assert (h.PEAK not in h.fib_matrix[idx, peak_idx + 1:candle_idx])
+
+
+def test_search_cache():
+    hc = HarmonicSearch(t, fib_tolerance=0.03, check_anchor=False)
+    hc.search()
+    searched = hc.cache_info()
+    assert (searched['hits'] > 0 and searched['misses'] == searched['size'])
+    hc.forming()
+    assert (hc.cache_info()['hits'] > searched['hits'])
+    assert (sorted(p.p_id for p in hc._formed[constants.XABCD]) == sorted(p.p_id for p in h._formed[constants.XABCD]))
+    assert (sorted(p.p_id for p in hc._forming[constants.ABCD]) == sorted(p.p_id for p in h._forming[constants.ABCD]))
+    filtered = hc._search_candle(hc.MATRIX_LEN - 1, constants.ABC, filter_by={'gartley'})
+    assert (all(patterns == {'gartley'} for patterns in filtered.values()))
+    hc._build_fib_matrix()
+    assert (hc.cache_info() == {'hits': 0, 'misses': 0, 'size': 0})
+
+
+def test_update():
+    tu = OHLCTechnicals(b.df.iloc[:900], b.symbol, b.interval, peak_spacing=10)
+    hu = HarmonicSearch(tu, fib_tolerance=0.03, check_anchor=False)
+    hu.search()
+    before = {family: [p.p_id for p in patterns] for family, patterns in hu._formed.items()}
+    delta = hu.update(b.df.iloc[:950])
+    hu._build_anchor_table()  # saves the stacks at the stable peak
+    delta_2 = hu.update(b.df)
+    assert ((hu.fib_matrix == h.fib_matrix).all())
+    assert (hu._anchor_resume is not None and hu._build_anchor_table() == h._build_anchor_table())
+    for family, patterns in h._formed.items():
+        assert ([p.p_id for p in hu._formed[family]] == [p.p_id for p in patterns])
+        new = [p.p_id for p in delta[family] + delta_2[family]]
+        assert (sorted(before[family] + new) == sorted(p.p_id for p in patterns))
+
+
+def test_update_revised():
+    # The last candle is fetched while it is still forming, the later fetch moves its peaks.
+    for start, forming, end in ((400, 425, 444), (600, 630, 660)):
+        tu = OHLCTechnicals(b.df.iloc[:start], b.symbol, b.interval, peak_spacing=2, required=())
+        hu = HarmonicSearch(tu, check_anchor=False)
+        hu.search()
+        revised = b.df.iloc[:forming].copy()
+        revised.iloc[-1, revised.columns.get_loc(b.HIGH)] *= 1.03
+        revised.iloc[-1, revised.columns.get_loc(b.LOW)] *= 0.97
+        hu.update(revised)
+        hu.update(b.df.iloc[:end])
+        fresh = HarmonicSearch(OHLCTechnicals(b.df.iloc[:end], b.symbol, b.interval, peak_spacing=2, required=()), check_anchor=False)
+        fresh.search()
+        assert ((hu.fib_matrix == fresh.fib_matrix).all() and hu._index_rows == fresh._index_rows)
+        for family, patterns in fresh._formed.items():
+            assert (sorted(p.p_id for p in hu._formed[family]) == sorted(p.p_id for p in patterns))
+
+
+def _anchor_walk(prices, is_high, anchor_idx, peak_idx, retrace_limit):
+    # The original walk back from the anchor, one peak at a time.
+    start_price, start_is_high = prices[anchor_idx], is_high[anchor_idx]
+    move = abs(prices[peak_idx] - start_price)
+    for idx in range(anchor_idx - 1, -1, -1):
+        if start_is_high != is_high[idx]:
+            retrace_move = abs(start_price - prices[idx])
+            if retrace_move and retrace_move / move >= retrace_limit:
+                return True
+        elif (start_is_high and prices[idx] > start_price) or (not start_is_high and prices[idx] < start_price):
+            return False
+    return True
+
+
+def test_anchor_table():
+    size = len(hn._prices)
+    # The walk divides by a zero move for a peak level with its anchor.
+    with np.errstate(divide='ignore'):
+        for anchor_idx in range(size):
+            for peak_idx in range(anchor_idx + 1, min(size, anchor_idx + 8)):
+                for retrace_limit in (0.0, 0.382, 1.0):
+                    expected = _anchor_walk(hn._prices, hn._is_high, anchor_idx, peak_idx, retrace_limit)
+                    assert (hn._is_anchor_valid(anchor_idx, peak_idx, retrace_limit) == expected)
+
+
+def test_pattern_slots():
+    hs = HarmonicSearch(t, fib_tolerance=0.03, check_anchor=False)
+    hs.search()
+    p = hs._formed[constants.XABCD][0]
+    assert not hasattr(p, '__dict__')
+    # Times and the id are only looked up when read.
+    assert (p._x is None and p._p_id is None)
+    assert (p.x == t.get_index_x(p.indexes))
+    assert (p.p_id in [i.p_id for i in h._formed[constants.XABCD]])
+
+    q = pickle.loads(pickle.dumps(hs._formed[constants.XABCD][1]))
+    assert (q._times is None)
+    assert (q.to_dict() == hs._formed[constants.XABCD][1].to_dict())
+    assert (q.p_id == hs._formed[constants.XABCD][1].p_id)
+
+
+def test_stats():
+    reported = []
+    stats = Stats(callback=lambda phase, seconds, s: reported.append(phase))
+    ts = OHLCTechnicals(b.df.iloc[:950], b.symbol, b.interval, peak_spacing=10, stats=stats)
+    hs = HarmonicSearch(ts, fib_tolerance=0.03, check_anchor=True)
+    hs.search()
+    hs.forming()
+    hs.update(b.df)
+    assert (reported == ['technicals.build', 'harmonic.fib_matrix', 'harmonic.search', 'harmonic.forming',
+                         'technicals.update', 'harmonic.update'])
+    assert (stats.counters['technicals.candles'] == len(b.df))
+    assert (stats.gauges['harmonic.peaks'] == hn.MATRIX_LEN)
+    assert (stats.calls['harmonic.search_candle'] == hs._cache_hits + hs._cache_misses)
+    assert (0 < stats.counters['harmonic.anchor_rejected'] < stats.calls['harmonic.anchor'])
+    assert (stats.counters['harmonic.forming'] == sum(len(p) for p in hs._forming.values()))
+    assert (stats.timings['harmonic.search'] >= stats.timings['harmonic.xabcd'])
+    # Profiling does not change what is found.
+    assert (sorted(p.p_id for p in hs._formed[constants.XABCD]) == sorted(p.p_id for p in hn._formed[constants.XABCD]))
+    assert ('_build_fib_matrix' not in vars(hn) and hn.stats is None)
@@ -0,0 +1,40 @@
+__author__ = 'github.com/niall-oc'
+
+import subprocess
+import sys
+import os
+
+HEAVY = ('plotly', 'yfinance', 'binance', 'alpaca_trade_api')
+
+
+def loaded_after(statement):
+    """
+    Run a statement in a fresh interpreter and return the heavy backends it loaded.
+    """
+    probe = f"import sys\n{statement}\nprint(','.join(m for m in {HEAVY!r} if m in sys.modules))"
+    # The child finds pyharmonics on the same path as the tests.
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(p for p in sys.path if p))
+    out = subprocess.run([sys.executable, '-c', probe], check=True, capture_output=True, text=True, env=env).stdout
+    return [m for m in out.strip().split(',') if m]
+
+
+def test_headless_imports():
+    assert loaded_after('import pyharmonics') == []
+    assert loaded_after('from pyharmonics import OHLCTechnicals\nfrom pyharmonics.search import HarmonicSearch') == []
+    assert loaded_after('import pyharmonics.marketdata') == []
+    assert loaded_after('import pyharmonics.quick') == []
+
+
+def test_lazy_attributes():
+    assert loaded_after('from pyharmonics.marketdata import BinanceCandleData') == ['binance']
+    assert 'plotly' in loaded_after('from pyharmonics import HarmonicPlotter')
+    assert 'plotly' in loaded_after('import pyharmonics\npyharmonics.plotter.PositionPlotter')
+
+
+def test_namespace():
+    import pyharmonics
+    import pyharmonics.marketdata
+    import pyharmonics.plotter
+    for package in (pyharmonics, pyharmonics.marketdata, pyharmonics.plotter):
+        assert ('importlib' not in dir(package))
+        assert (set(package.__all__) <= set(dir(package)))
@@ -1,6 +1,24 @@
 from pyharmonics.marketdata.candle_base import CandleData
+import pandas as pd
 import pytest
 
 def test_marketdata():
     with pytest.raises(TypeError):
         m = CandleData()
+
+
+class OwnCandleData(CandleData):
+    """
+    A source written before the cache, it only overrides get_candles.
+    """
+    def get_candles(self, symbol, interval, num_candles=None, start=None, end=None):
+        self._set_params(symbol, interval, num_candles=num_candles, start=start, end=end)
+        self.df = pd.read_pickle('tests/data/btc_test_data')[-num_candles:]
+
+
+def test_own_get_candles():
+    m = OwnCandleData()
+    m.get_candles('BTCUSDT', m.HOUR_1, num_candles=100)
+    assert (len(m.df) == 100)
+    with pytest.raises(NotImplementedError):
+        m._get_candles('BTCUSDT', m.HOUR_1)
@@ -0,0 +1,59 @@
+__author__ = 'github.com/niall-oc'
+
+from pyharmonics.marketdata import BinanceCandleData
+from pyharmonics import quick
+import pandas as pd
+import time
+
+
+class PickledCandleData(BinanceCandleData):
+    """
+    Serves the test candles instead of calling the exchange.
+    """
+    def get_candles(self, symbol, interval, num_candles=None, start=None, end=None):
+        if symbol != 'BTCUSDT':
+            raise ValueError(f'No candles for {symbol}')
+        self._set_params(symbol, interval, num_candles, start, end)
+        self.df = pd.read_pickle('tests/data/btc_test_data').iloc[-self.num_candles:]
+
+
+class SlowCandleData(PickledCandleData):
+    DELAY = 2
+
+    def get_candles(self, symbol, interval, num_candles=None, start=None, end=None):
+        time.sleep(self.DELAY)
+        super().get_candles(symbol, interval, num_candles, start, end)
+
+
+class QueuedCandleData(SlowCandleData):
+    DELAY = 0.5
+
+
+def test_scan():
+    results = list(quick.scan(
+        ['BTCUSDT', 'NOPE'], [BinanceCandleData.HOUR_1, BinanceCandleData.HOUR_4],
+        source=PickledCandleData, limit_to=-1, fetch_workers=2, search_workers=2
+    ))
+    assert (len(results) == 4)
+    by_key = {(r['symbol'], r['interval']): r for r in results}
+    found = by_key[('BTCUSDT', BinanceCandleData.HOUR_1)]
+    assert (found['error'] is None)
+    assert (sum(len(p) for p in found['formed'].values()) > 0)
+    assert (set(found['divergences']) == {'rsi', 'macd'})
+    assert (all(len(p) > 0 for p in found['divergences'].values()))
+    assert ('NOPE' in by_key[('NOPE', BinanceCandleData.HOUR_4)]['error'])
+
+
+def test_scan_timeout():
+    results = list(quick.scan(['BTCUSDT'], [BinanceCandleData.HOUR_1], source=SlowCandleData, timeout=0.2))
+    assert (results[0]['error'] == 'Timed out after 0.2s')
+
+
+def test_scan_timeout_queued():
+    # Fetches waiting for the one fetch thread are not timed out, each one runs in under the timeout.
+    results = list(quick.scan(
+        ['BTCUSDT'], ['1h', '4h', '1d', '1w'], source=QueuedCandleData, candles=300,
+        fetch_workers=1, search_workers=1, timeout=1.2
+    ))
+    assert (len(results) == 4)
+    assert (all(r['error'] is None for r in results))
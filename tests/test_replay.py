@@ -0,0 +1,53 @@
+__author__ = 'github.com/niall-oc'
+
+from pyharmonics import utils
+from pyharmonics.search import HarmonicSearch, HarmonicReplay
+from pyharmonics.technicals import OHLCTechnicals
+import pandas as pd
+import pytest
+
+df = pd.read_pickle("tests/data/btc_test_data").iloc[:600]
+
+
+def p_ids(patterns):
+    return sorted(p.p_id for found in patterns.values() for p in found)
+
+
+def test_peaks_changed():
+    r = HarmonicReplay(df, 'BTCUSDT', '1h', warmup=300)
+    (high, greater, peaks), (low, less, dips) = r._tracked
+    for end in range(1, len(df) + 1):
+        r._peaks_changed(end)
+        assert (peaks[:end] == utils.find_peaks(high[:end], greater, order=10)).all()
+        assert (dips[:end] == utils.find_peaks(low[:end], less, order=10)).all()
+
+
+def test_replay():
+    r = HarmonicReplay(df, 'BTCUSDT', '1h', warmup=300)
+    formed = set()
+    steps = 0
+    for step in r.run():
+        steps += 1
+        i = step['index']
+        t = OHLCTechnicals(df.iloc[:i + 1], 'BTCUSDT', '1h', peak_spacing=10, required=())
+        h = HarmonicSearch(t)
+        h.search()
+        assert step['time'] == df.index[i]
+        assert (r.technicals.df.index[-1] == df.index[i])
+        assert (r.search.fib_matrix == h.fib_matrix).all()
+        assert p_ids(r.search.get_patterns()) == p_ids(h.get_patterns())
+        # Every formed pattern was reported on the step it formed.
+        formed.update(p_ids(step['formed']))
+        assert formed.issuperset(p_ids(h.get_patterns()))
+        h.forming(limit_to=10, percent_c_to_d=0.8)
+        assert p_ids(step['forming']) == p_ids(h.get_patterns(formed=False))
+    # Candles that change no peak are skipped, the rest are replayed in the final flush.
+    assert 1 < steps < len(df) - 300
+    assert r.technicals.df.index[-1] == df.index[-1]
+
+
+def test_warmup():
+    with pytest.raises(ValueError):
+        HarmonicReplay(df, 'BTCUSDT', '1h', warmup=0)
+    with pytest.raises(ValueError):
+        HarmonicReplay(df, 'BTCUSDT', '1h', warmup=len(df) + 1)
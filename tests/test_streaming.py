@@ -0,0 +1,83 @@
+__author__ = 'github.com/niall-oc'
+
+from pyharmonics import streaming
+from ta.trend import MACD, SMAIndicator, EMAIndicator
+from ta.momentum import RSIIndicator, StochRSIIndicator
+from ta.volatility import BollingerBands
+import pandas as pd
+import numpy as np
+import pytest
+
+df = pd.read_pickle('tests/data/btc_test_data')
+close = df['close']
+
+
+def stream(updater, seed_len=300):
+    updater.seed(close.values[:seed_len])
+    return np.array([updater.update(c) for c in close.values[seed_len:]])
+
+
+@pytest.mark.parametrize('seed_len', [0, 10, 300])
+def test_macd(seed_len):
+    expected = MACD(close=close, window_slow=26, window_fast=12, window_sign=9).macd_diff().values[seed_len:]
+    assert np.allclose(stream(streaming.MACD(window_slow=26, window_fast=12, window_sign=9), seed_len), expected, equal_nan=True)
+
+
+@pytest.mark.parametrize('seed_len', [0, 10, 300])
+def test_rsi(seed_len):
+    expected = RSIIndicator(close=close, window=14).rsi().values[seed_len:]
+    assert np.allclose(stream(streaming.RSI(window=14), seed_len), expected, equal_nan=True)
+
+
+@pytest.mark.parametrize('seed_len', [0, 20, 300])
+def test_stoch_rsi(seed_len):
+    expected = StochRSIIndicator(close=close, window=14).stochrsi_d().values[seed_len:]
+    assert np.allclose(stream(streaming.StochRSI(window=14), seed_len), expected, equal_nan=True)
+
+
+@pytest.mark.parametrize('seed_len', [0, 10, 300])
+def test_bollinger_percent(seed_len):
+    expected = BollingerBands(close=close, window=20, window_dev=2).bollinger_pband().values[seed_len:]
+    assert np.allclose(stream(streaming.BollingerPercent(window=20, window_dev=2), seed_len), expected, equal_nan=True)
+
+
+def test_bollinger_percent_flat():
+    # A band with no width has no %B, the rolling sums must not leave it a rounding error wide.
+    flat = pd.Series(np.concatenate((np.full(40, 27000.13), np.linspace(27000.13, 27100.0, 40), np.full(40, 26000.7))))
+    expected = BollingerBands(close=flat, window=20, window_dev=2).bollinger_pband().values
+    b = streaming.BollingerPercent(window=20, window_dev=2)
+    assert np.allclose([b.update(c) for c in flat.values], expected, equal_nan=True)
+
+
+def test_moving_averages():
+    sma = SMAIndicator(close=close, window=50).sma_indicator().values[300:]
+    ema = EMAIndicator(close=close, window=21).ema_indicator().values[300:]
+    assert np.allclose(stream(streaming.SMA(window=50)), sma, equal_nan=True)
+    assert np.allclose(stream(streaming.EMA(window=21)), ema, equal_nan=True)
+
+
+@pytest.mark.parametrize('updater', [
+    lambda: streaming.MACD(window_slow=26, window_fast=12, window_sign=9),
+    lambda: streaming.RSI(window=14),
+    lambda: streaming.StochRSI(window=14),
+    lambda: streaming.BollingerPercent(window=20, window_dev=2),
+    lambda: streaming.SMA(window=50),
+    lambda: streaming.EMA(window=21)
+])
+def test_rollback(updater):
+    # Every candle is first read with a made up close that rollback takes back.
+    expected = stream(updater(), 100)
+    revised = updater()
+    revised.seed(close.values[:100])
+    readings = []
+    for c in close.values[100:]:
+        state = revised.checkpoint()
+        revised.update(c * 1.07)
+        revised.rollback(state)
+        readings.append(revised.update(c))
+    assert np.allclose(readings, expected, equal_nan=True)
+
+
+def test_fillna():
+    with pytest.raises(ValueError):
+        streaming.RSI(window=14, fillna=True)
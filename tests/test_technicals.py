@@ -4,6 +4,7 @@ from pyharmonics.marketdata import BinanceCandleData
 from pyharmonics.technicals import OHLCTechnicals, Technicals
 import pandas as pd
 import numpy as np
+import pytest
 
 b = BinanceCandleData()
 b._set_params('BTCUSDT', b.HOUR_1, 1000, None, None)
@@ -77,6 +78,94 @@ def test_single_trend_technicals():
     assert len(of) > 0
     assert Technicals.PRICE_PEAKS in list(t.df.columns)
 
+
+def test_update():
+    tu = OHLCTechnicals(b.df.iloc[:900], b.symbol, b.interval, peak_spacing=20)
+    assert (tu.update(b.df.iloc[:950]) == 50)
+    assert (tu.update(b.df) == 50)
+    assert (tu.update(b.df) == 0)
+    # Peaks are kept by update, df and the moving averages are built when read.
+    assert (tu.peak_data == t.peak_data)
+    assert np.array_equal(tu.peak_highs, t.peak_highs) and np.array_equal(tu.lows, t.lows)
+    assert (tu.get_stable_candle() == len(b.df) - 21)
+    pd.testing.assert_series_equal(tu.smas[t.SMA_50].sma_indicator(), t.smas[t.SMA_50].sma_indicator())
+    pd.testing.assert_frame_equal(tu.df, t.df, check_exact=False, rtol=1e-9, atol=1e-9)
+
+
+def test_update_revised():
+    # The last candle is fetched while it is still forming, with a new high that a later fetch takes back.
+    forming = b.df.iloc[:950].copy()
+    forming.iloc[-1, forming.columns.get_loc(b.HIGH)] = forming[b.HIGH].max() * 1.1
+    forming.iloc[-1, forming.columns.get_loc(b.CLOSE)] *= 1.05
+    fresh = OHLCTechnicals(forming, b.symbol, b.interval, peak_spacing=20)
+    closed = OHLCTechnicals(b.df.iloc[:950], b.symbol, b.interval, peak_spacing=20)
+    # Before and after the streaming updaters are seeded.
+    for start in (forming.iloc[:900], forming):
+        tu = OHLCTechnicals(start, b.symbol, b.interval, peak_spacing=20)
+        tu.update(forming)
+        pd.testing.assert_frame_equal(tu.df, fresh.df, check_exact=False, rtol=1e-9, atol=1e-9)
+        assert (tu.update(b.df.iloc[:950]) == 1)
+        pd.testing.assert_frame_equal(tu.df, closed.df, check_exact=False, rtol=1e-9, atol=1e-9)
+        assert (tu.peak_data == closed.peak_data)
+        assert (tu.update(b.df) == 50)
+        pd.testing.assert_frame_equal(tu.df, t.df, check_exact=False, rtol=1e-9, atol=1e-9)
+        assert (tu.peak_data == t.peak_data)
+        # The same updates without reading df in between.
+        tu = OHLCTechnicals(start, b.symbol, b.interval, peak_spacing=20)
+        tu.update(forming)
+        tu.update(b.df.iloc[:950])
+        assert (tu.peak_data == closed.peak_data)
+        tu.update(b.df)
+        pd.testing.assert_frame_equal(tu.df, t.df, check_exact=False, rtol=1e-9, atol=1e-9)
+
+
+def test_peaks():
+    assert (t.peaks.dtype == t.PEAK_DTYPE)
+    assert np.all(np.diff(t.peak_indexes) >= 0)
+    assert np.array_equal(t.peak_highs['index'], t.get_peak_x_y(t.PRICE_PEAKS)[0])
+    assert np.array_equal(t.peak_lows['price'], t.get_peak_x_y(t.PRICE_DIPS)[1])
+    assert (len(t.filter_peak_data()) + len(t.filter_peak_data(lows=True)) == len(t.peaks))
+    assert (t.peak_data[0] == (t.peak_indexes[0], t.peak_prices[0], t.peak_type[0]))
+    assert (t.filter_peak_data(lows=True)[0][t.PEAK_PRICE] == t.peak_lows['price'][0])
+
+
+def test_no_copy():
+    source = b.df.copy()
+    ts = OHLCTechnicals(source, b.symbol, b.interval, peak_spacing=20, copy=False)
+    pd.testing.assert_frame_equal(ts.df, t.df)
+    assert np.shares_memory(ts.df[b.CLOSE].values, source[b.CLOSE].values)
+    assert (list(source.columns) == list(b.df.columns))
+
+    # Appending candles never writes through to the candles shared.
+    ts = OHLCTechnicals(source.iloc[:900], b.symbol, b.interval, peak_spacing=20, copy=False)
+    ts.update(source)
+    pd.testing.assert_frame_equal(source, b.df)
+
+
+def test_required():
+    tr = OHLCTechnicals(b.df, b.symbol, b.interval, peak_spacing=20, required=())
+    assert (list(tr.df.columns) == list(b.df.columns) + [t.PRICE_PEAKS, t.PRICE_DIPS])
+    assert (tr.peak_data == t.peak_data)
+
+    # Reading an indicator calculates it, and its peaks, once.
+    pd.testing.assert_series_equal(tr.indicators[t.RSI], t.indicators[t.RSI])
+    assert (t.RSI_DIPS in tr.df.columns and t.MACD not in tr.df.columns)
+    assert (list(tr.indicators) == list(t.indicators))
+    tr.require(t.EMA_21, t.MACD_PEAKS)
+    assert (t.EMA_21 in tr.df.columns and t.MACD in tr.df.columns)
+    tr.require()
+    pd.testing.assert_frame_equal(tr.df[t.df.columns], t.df)
+    with pytest.raises(ValueError):
+        tr.require('unknown')
+
+    # Only the columns held are streamed on update.
+    tu = OHLCTechnicals(b.df.iloc[:900], b.symbol, b.interval, peak_spacing=20, required=(t.MACD,))
+    tu.update(b.df)
+    assert (set(tu._streams) == {t.MACD})
+    tu.require()
+    pd.testing.assert_frame_equal(tu.df[t.df.columns], t.df, check_exact=False, rtol=1e-9, atol=1e-9)
+
+
 if __name__ == '__main__':
     # For debugging
     test_rsi_dips()
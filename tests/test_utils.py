@@ -1,5 +1,6 @@
 from pyharmonics import utils
 from pyharmonics import constants
+import numpy as np
 import pytest
 
 
@@ -86,3 +87,70 @@ def test_line_slope():
     assert utils.line_slope(5, 2, 6, 3) == 1
     assert utils.line_slope(3, 3, 5, 2) == 0
     assert utils.line_slope(2, 6, 1, 4) == 1.3333333333333333
+
+
+def test_get_retrace_intervals():
+    patterns = utils.get_pattern_definition(0.03, constants.MATRIX_PATTERNS)
+    intervals = utils.get_retrace_intervals(patterns)
+    for stage, stage_patterns in patterns.items():
+        bounds, points, gaps = intervals[stage]
+        assert (len(gaps) == len(points) + 1)
+        for retrace in bounds + [0.0, 0.3, 0.5, 0.61, 0.7, 1.0, 1.2, 1.5, 2.0, 3.5, 10.0]:
+            expected = {
+                p for p, d in stage_patterns.items()
+                if d[constants.MIN] <= retrace <= d[constants.MAX]
+            }
+            i = sum(1 for b in bounds if b < retrace)
+            found = points[i] if i < len(bounds) and bounds[i] == retrace else gaps[i]
+            assert (found == expected)
+
+
+def _find_peaks_loop(data, comparator, order):
+    # The original plateau pass, one candle at a time.
+    results = np.ones(data.shape, dtype=bool)
+    locs = np.arange(0, len(data))
+    for shift in range(1, order + 1):
+        results &= comparator(data, data.take(locs + shift, mode='clip'))
+        results &= comparator(data, data.take(locs - shift, mode='clip'))
+    plateaus = (data == np.roll(data, 1))
+    for i in range(len(plateaus)):
+        if plateaus[i]:
+            results[i - 1] = False
+    return results
+
+
+@pytest.mark.parametrize('order', [1, 3, 10])
+def test_find_peaks(order):
+    rng = np.random.default_rng(order)
+    # Small integers give plenty of plateaus, including one wrapping from the last value to the first.
+    data = rng.integers(0, 6, 500).astype(float)
+    data[-1] = data[0]
+    for comparator in (np.greater_equal, np.less_equal):
+        assert (utils.find_peaks(data, comparator, order=order) == _find_peaks_loop(data, comparator, order)).all()
+
+
+def test_find_peaks_batch():
+    rng = np.random.default_rng(7)
+    data = rng.integers(0, 6, (4, 300)).astype(float)
+    comparators = (np.greater_equal, np.less_equal, np.greater_equal, np.less_equal)
+    results = utils.find_peaks_batch(data, comparators, order=5)
+    assert results.shape == data.shape
+    for row, comparator in zip(range(len(data)), comparators):
+        assert (results[row] == utils.find_peaks(data[row], comparator, order=5)).all()
+    assert (utils.find_peaks_batch(data, np.greater_equal, order=5)[1] == utils.find_peaks(data[1], np.greater_equal, order=5)).all()
+    with pytest.raises(ValueError):
+        utils.find_peaks_batch(data, comparators[:2])
+    with pytest.raises(ValueError):
+        utils.find_peaks_batch(data[0], np.greater_equal)
+
+
+def test_find_tail_peaks():
+    rng = np.random.default_rng(11)
+    data = rng.integers(0, 6, (2, 300)).astype(float)
+    comparators = (np.greater_equal, np.less_equal)
+    for start in (0, 3, 150, 295, 299):
+        results = utils.find_tail_peaks_batch(data, comparators, start, order=5)
+        for row, comparator in enumerate(comparators):
+            expected = utils.find_peaks(data[row], comparator, order=5)[start:]
+            assert (utils.find_tail_peaks(data[row], comparator, start, order=5) == expected).all()
+            assert (results[row] == expected).all()